@@ -0,0 +1,348 @@
+"""
+Shared runner for the day solvers.
+
+Every `dayN.py` exposes `parse_input(input)`, `part1(parsed)` and `part2(parsed)`.
+The runner parses the input once, times the parse, part 1 and part 2 phases
+separately and reports the results as text, JSON or CSV.
+
+usage:
+    python -m aoc run DAY [INPUT] [--repeat N] [--warmup N] [--format text|json|csv]
+                      [--trace off|summary|frame|step] [--trace-file FILE]
+    python -m aoc gen DAY SCALE [--seed N] [-o FILE]
+    python -m aoc bench [DAY ...] [--scales N ...] [--format text|json|csv]
+"""
+import argparse
+import contextlib
+import csv
+import importlib
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import ModuleType
+from typing import Any, Callable, Iterator, NamedTuple
+
+import generate
+import tracing
+
+
+class PhaseResult(NamedTuple):
+    phase: str
+    answer: Any
+    times: list[float]
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "min": min(self.times),
+            "mean": statistics.fmean(self.times),
+            "median": statistics.median(self.times),
+            "max": max(self.times),
+        }
+
+
+def load_day(day: int) -> ModuleType:
+    return importlib.import_module(f"day{day}")
+
+
+def time_call(function: Callable[[], Any], repeat: int, warmup: int) -> tuple[Any, list[float]]:
+    """Calls `function` `warmup` times untimed, then `repeat` times timed."""
+    result = None
+    for _ in range(warmup):
+        result = function()
+
+    times: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+
+    return result, times
+
+
+def run_day(
+    module: ModuleType,
+    path: str,
+    repeat: int = 1,
+    warmup: int = 0,
+    parts: tuple[str, ...] = ("part1", "part2"),
+) -> list[PhaseResult]:
+    """
+    Parses `path` once and runs the requested parts on the parsed input.
+
+    Solver output is sent to stderr so that it never mixes with the results.
+    """
+    results: list[PhaseResult] = []
+
+    with open(path) as file, contextlib.redirect_stdout(sys.stderr):
+        parsed, times = time_call(lambda: module.parse_input(file), repeat, warmup)
+        results.append(PhaseResult("parse", None, times))
+
+        for part in parts:
+            solver = getattr(module, part)
+            answer, times = time_call(lambda: solver(parsed), repeat, warmup)
+            results.append(PhaseResult(part, to_plain(answer), times))
+
+    return results
+
+
+def measure_memory(
+    module: ModuleType,
+    path: str,
+    parts: tuple[str, ...] = ("part1", "part2"),
+) -> dict[str, int]:
+    """Runs each phase once more under tracemalloc, returning its peak bytes."""
+    peaks: dict[str, int] = {}
+
+    def traced(phase: str, function: Callable[[], Any]) -> Any:
+        tracemalloc.start()
+        try:
+            result = function()
+            peaks[phase] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return result
+
+    with open(path) as file, contextlib.redirect_stdout(sys.stderr):
+        parsed = traced("parse", lambda: module.parse_input(file))
+        for part in parts:
+            solver = getattr(module, part)
+            traced(part, lambda: solver(parsed))
+
+    return peaks
+
+
+def to_plain(answer: Any) -> Any:
+    """Converts numpy scalars and the like into plain JSON friendly values."""
+    if hasattr(answer, "item"):
+        return answer.item()
+    return answer
+
+
+def format_text(day: int, path: str, results: list[PhaseResult]) -> str:
+    lines = [f"day {day} ({path})"]
+    for result in results:
+        stats = result.stats()
+        answer = "" if result.answer is None else f" = {result.answer}"
+        lines.append(
+            f"  {result.phase:<6}{answer:<24} "
+            f"min {stats['min'] * 1000:10.3f}ms  "
+            f"median {stats['median'] * 1000:10.3f}ms  "
+            f"({len(result.times)} runs)"
+        )
+    return "\n".join(lines)
+
+
+def format_json(day: int, path: str, results: list[PhaseResult]) -> str:
+    return json.dumps(
+        {
+            "day": day,
+            "input": path,
+            "phases": {
+                result.phase: {"answer": result.answer, "times": result.times, **result.stats()}
+                for result in results
+            },
+        },
+        indent=2,
+    )
+
+
+def write_csv(day: int, path: str, results: list[PhaseResult], header: bool = True):
+    writer = csv.writer(sys.stdout)
+    if header:
+        writer.writerow(["day", "input", "phase", "answer", "runs", "min", "mean", "median", "max"])
+
+    for result in results:
+        stats = result.stats()
+        writer.writerow([
+            day,
+            path,
+            result.phase,
+            "" if result.answer is None else result.answer,
+            len(result.times),
+            stats["min"],
+            stats["mean"],
+            stats["median"],
+            stats["max"],
+        ])
+
+
+def command_run(args: argparse.Namespace):
+    path = args.input or f"day{args.day}.txt"
+    parts = tuple(f"part{part}" for part in args.parts)
+
+    if args.trace is not None:
+        tracing.set_level(args.trace)
+    with contextlib.ExitStack() as stack:
+        if args.trace_file is not None:
+            tracing.set_sink(stack.enter_context(open(args.trace_file, "w")))
+            stack.callback(tracing.set_sink, None)
+
+        results = run_day(load_day(args.day), path, args.repeat, args.warmup, parts)
+
+    if args.format == "json":
+        print(format_json(args.day, path, results))
+    elif args.format == "csv":
+        write_csv(args.day, path, results)
+    else:
+        print(format_text(args.day, path, results))
+
+
+class BenchRow(NamedTuple):
+    day: int
+    scale: int
+    input_bytes: int
+    phase: str
+    seconds: float
+    peak_bytes: int
+    time_exponent: float | None
+    memory_exponent: float | None
+
+
+def growth_exponent(size: int, value: float, previous_size: int, previous_value: float) -> float | None:
+    """Slope on a log-log plot, e.g. ~1 for linear and ~2 for quadratic growth."""
+    if size == previous_size or value <= 0 or previous_value <= 0:
+        return None
+    return math.log(value / previous_value) / math.log(size / previous_size)
+
+
+def bench_day(
+    day: int,
+    scales: tuple[int, ...],
+    seed: int = 0,
+    repeat: int = 1,
+    parts: tuple[str, ...] = ("part1", "part2"),
+) -> Iterator[BenchRow]:
+    """
+    Runs a day on generated inputs of increasing scale, reporting how the runtime
+    and peak memory of every phase grow with the size of the input.
+    """
+    module = load_day(day)
+    previous: dict[str, BenchRow] = {}
+
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"day{day}-{scale}.txt")
+            with open(path, "w") as file:
+                file.write(generate.generate(day, scale, seed))
+
+            input_bytes = os.path.getsize(path)
+            results = run_day(module, path, repeat, 0, parts)
+            peaks = measure_memory(module, path, parts)
+
+        for result in results:
+            seconds = min(result.times)
+            peak = peaks[result.phase]
+            time_exponent = memory_exponent = None
+            if (last := previous.get(result.phase)) is not None:
+                time_exponent = growth_exponent(input_bytes, seconds, last.input_bytes, last.seconds)
+                memory_exponent = growth_exponent(input_bytes, peak, last.input_bytes, last.peak_bytes)
+
+            row = BenchRow(
+                day, scale, input_bytes, result.phase, seconds, peak, time_exponent, memory_exponent
+            )
+            previous[result.phase] = row
+            yield row
+
+
+BENCH_HEADER = (
+    f"{'day':>3} {'scale':>10} {'input':>12} {'phase':<6} "
+    f"{'time':>12} {'growth':>7} {'peak mem':>12} {'growth':>7}"
+)
+
+
+def format_bench_row(row: BenchRow) -> str:
+    def exponent(value: float | None) -> str:
+        return "" if value is None else f"n^{value:.2f}"
+
+    return (
+        f"{row.day:>3} {row.scale:>10} {row.input_bytes:>12} {row.phase:<6} "
+        f"{row.seconds * 1000:10.2f}ms {exponent(row.time_exponent):>7} "
+        f"{row.peak_bytes / 1024:10.1f}kB {exponent(row.memory_exponent):>7}"
+    )
+
+
+def command_gen(args: argparse.Namespace):
+    options = {"operands": args.operands} if args.operands is not None else {}
+    text = generate.GENERATORS[args.day](args.scale, random.Random(args.seed), **options)
+
+    if args.output is None:
+        sys.stdout.write(text)
+        return
+
+    with open(args.output, "w") as file:
+        file.write(text)
+
+
+def command_bench(args: argparse.Namespace):
+    parts = tuple(f"part{part}" for part in args.parts)
+    rows = (
+        row
+        for day in args.days or sorted(generate.GENERATORS)
+        for row in bench_day(
+            day, tuple(args.scales or generate.DEFAULT_SCALES[day]), args.seed, args.repeat, parts
+        )
+    )
+
+    if args.format == "json":
+        print(json.dumps([row._asdict() for row in rows], indent=2))
+    elif args.format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(BenchRow._fields)
+        for row in rows:
+            writer.writerow(row)
+            sys.stdout.flush()
+    else:
+        print(BENCH_HEADER, flush=True)
+        for row in rows:
+            print(format_bench_row(row), flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="aoc", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="parse once and time each phase of a day")
+    run.add_argument("day", type=int)
+    run.add_argument("input", nargs="?", help="input file (default: dayN.txt)")
+    run.add_argument("--repeat", type=int, default=1, help="timed runs per phase")
+    run.add_argument("--warmup", type=int, default=0, help="untimed runs per phase")
+    run.add_argument("--parts", type=int, nargs="+", choices=(1, 2), default=[1, 2])
+    run.add_argument("--format", choices=("text", "json", "csv"), default="text")
+    run.add_argument("--trace", choices=[level.name.lower() for level in tracing.Level])
+    run.add_argument("--trace-file", help="write traces here instead of stderr")
+    run.set_defaults(handler=command_run)
+
+    gen = commands.add_parser("gen", help="generate a seeded input for a day")
+    gen.add_argument("day", type=int, choices=sorted(generate.GENERATORS))
+    gen.add_argument("scale", type=int, help="size of the input, see generate.SCALE_UNITS")
+    gen.add_argument("--seed", type=int, default=0)
+    gen.add_argument("--operands", type=int, help="maximum operands per equation (day 7 only)")
+    gen.add_argument("-o", "--output", help="output file (default: stdout)")
+    gen.set_defaults(handler=command_gen)
+
+    bench = commands.add_parser("bench", help="time days across generated inputs of growing scale")
+    bench.add_argument("days", type=int, nargs="*", help="days to run (default: all)")
+    bench.add_argument("--scales", type=int, nargs="+", help="scales to run (default: per day)")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--repeat", type=int, default=1, help="timed runs per phase")
+    bench.add_argument("--parts", type=int, nargs="+", choices=(1, 2), default=[1, 2])
+    bench.add_argument("--format", choices=("text", "json", "csv"), default="text")
+    bench.set_defaults(handler=command_bench)
+
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "repeat", 1) < 1:
+        raise SystemExit("aoc: --repeat must be at least 1")
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
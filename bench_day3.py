@@ -0,0 +1,35 @@
+"""
+Benchmarks the day 3 instruction scanners on generated corrupted memory.
+
+usage: python bench_day3.py [size_in_bytes ...]
+"""
+import random
+import sys
+import timeit
+
+import day3
+from generate import generate_memory
+
+
+def bench(size: int, repeat: int = 3):
+    data = generate_memory(size, random.Random(0))
+
+    regex_result = day3.scan_instructions(data)[:2]
+    tokenizer_result = day3.tokenize_instructions(data)[:2]
+    assert regex_result == tokenizer_result, (regex_result, tokenizer_result)
+
+    regex_time = min(timeit.repeat(lambda: day3.scan_instructions(data), number=1, repeat=repeat))
+    tokenizer_time = min(timeit.repeat(lambda: day3.tokenize_instructions(data), number=1, repeat=repeat))
+
+    print(
+        f"{size:>12} bytes  "
+        f"regex {regex_time * 1000:10.2f}ms  "
+        f"tokenizer {tokenizer_time * 1000:10.2f}ms  "
+        f"speedup {regex_time / tokenizer_time:5.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000, 10_000_000]
+    for size in sizes:
+        bench(size)
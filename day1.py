@@ -1,29 +1,238 @@
 import io
+import math
 import sys
-import textwrap
-from typing import TextIO
+from typing import NamedTuple, TextIO
 
-def parse_input(input: TextIO) -> tuple[list[int], list[int]]:
+import numpy as np
+
+
+class LocationColumns(NamedTuple):
+    """Both location ID columns, each sorted ascending."""
+    left: np.ndarray
+    right: np.ndarray
+
+
+def parse_input(input: TextIO) -> LocationColumns:
     input.seek(0)
-    lines = input.readlines()
-    left_strs, right_strs = zip(*[line.split() for line in lines])
-    left = list(sorted(map(int, left_strs)))
-    right = list(sorted(map(int, right_strs)))
+    ids = np.array(input.read().split(), dtype=np.int64).reshape(-1, 2)
+    left = np.sort(ids[:, 0])
+    right = np.sort(ids[:, 1])
+
+    return LocationColumns(left, right)
+
+def part1(columns: LocationColumns):
+    left, right = columns
+    return int(np.abs(left - right).sum())
+
+def part2(columns: LocationColumns):
+    left, right = columns
+    values, counts = np.unique(right, return_counts=True)
+    if len(values) == 0:
+        return 0
+
+    # both columns are sorted, so each left item can find its
+    # count with a binary search rather than a dict lookup
+    index = np.minimum(np.searchsorted(values, left), len(values) - 1)
+    matched = values[index] == left
+    return int((left * counts[index] * matched).sum())
+
+
+class OnlineScores:
+    """
+    Keeps part1's total distance and part2's similarity score up to date
+    while left/right location ID pairs are inserted and removed.
+
+    Pairing by rank in sorted order means the total distance is the area
+    between the two counting functions, i.e. the sum over every ID `t` of
+    |#left <= t - #right <= t|. Inserting the pair (a, b) adds +1 or -1 to
+    that difference over the range between a and b, so the distance is kept
+    in a sqrt-decomposition over the ID range (blocks with a lazy offset and
+    a histogram of values). Single updates cost O(sqrt(max_id)) and batches
+    are folded in with one prefix sum and a rebuild, costing O(max_id + k).
+
+    Because the structure spans the ID range rather than the pairs, the range
+    [0, max_id] must be known up front: IDs outside it are rejected with a
+    ValueError, and memory (roughly 16 bytes per ID) and rebuilds grow with
+    `max_id` however few pairs are stored. For the puzzle's five digit IDs
+    that is well under 2MB.
+    """
+
+    def __init__(self, max_id: int):
+        assert max_id >= 0
+        self.max_id = max_id
+        self.distance = 0
+        self.similarity = 0
+        self.size = 0
+
+        self._left_counts: dict[int, int] = {}
+        self._right_counts: dict[int, int] = {}
+
+        self._block_size = max(1, math.isqrt(max_id))
+        self._rebuild(np.zeros(max_id, dtype=np.int64))
+
+    @classmethod
+    def from_columns(cls, columns: LocationColumns, max_id: int) -> "OnlineScores":
+        """Starts from the pairs in `columns`, accepting IDs up to `max_id` from then on."""
+        scores = cls(max_id)
+        scores.apply_batch(columns.left, columns.right)
+        return scores
+
+    def insert(self, left: int, right: int):
+        self._check_id(left)
+        self._check_id(right)
+
+        self._similarity_left(left, 1)
+        self._similarity_right(right, 1)
+        self._add_range(left, right, 1)
+        self.size += 1
+
+    def remove(self, left: int, right: int):
+        self._check_id(left)
+        self._check_id(right)
+        if self._left_counts.get(left, 0) == 0:
+            raise KeyError(f"left ID {left} is not present")
+        if self._right_counts.get(right, 0) == 0:
+            raise KeyError(f"right ID {right} is not present")
+
+        self._similarity_left(left, -1)
+        self._similarity_right(right, -1)
+        self._add_range(left, right, -1)
+        self.size -= 1
+
+    def apply_batch(self, left, right, sign=1):
+        """
+        Inserts (sign=1) or removes (sign=-1) many pairs at once. `sign` may
+        also be an array giving the direction of each pair individually.
+        """
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        sign = np.broadcast_to(np.asarray(sign, dtype=np.int64), left.shape)
+        assert left.shape == right.shape
+        if len(left) == 0:
+            return
+
+        for ids in (left, right):
+            if ids.min() < 0 or ids.max() > self.max_id:
+                raise ValueError(f"location IDs must lie in [0, {self.max_id}]")
+
+        left_delta = self._count_deltas(left, sign)
+        right_delta = self._count_deltas(right, sign)
+        new_left = {x: self._left_counts.get(x, 0) + d for x, d in left_delta.items()}
+        new_right = {x: self._right_counts.get(x, 0) + d for x, d in right_delta.items()}
+        if any(count < 0 for count in new_left.values()) or any(count < 0 for count in new_right.values()):
+            raise KeyError("batch removes IDs that are not present")
+
+        for x in left_delta.keys() | right_delta.keys():
+            before = self._left_counts.get(x, 0) * self._right_counts.get(x, 0)
+            after = new_left.get(x, self._left_counts.get(x, 0)) * new_right.get(x, self._right_counts.get(x, 0))
+            self.similarity += x * (after - before)
+
+        self._left_counts.update(new_left)
+        self._right_counts.update(new_right)
+
+        diff = np.zeros(self.max_id + 1, dtype=np.int64)
+        np.add.at(diff, left, sign)
+        np.subtract.at(diff, right, sign)
+        self._rebuild(self._differences() + np.cumsum(diff)[:-1])
+        self.size += int(sign.sum())
+
+    @staticmethod
+    def _count_deltas(ids: np.ndarray, sign: np.ndarray) -> dict[int, int]:
+        values, inverse = np.unique(ids, return_inverse=True)
+        deltas = np.zeros(len(values), dtype=np.int64)
+        np.add.at(deltas, inverse, sign)
+        return dict(zip(values.tolist(), deltas.tolist()))
+
+    def _check_id(self, id: int):
+        if id < 0 or id > self.max_id:
+            raise ValueError(f"location ID {id} must lie in [0, {self.max_id}]")
+
+    def _similarity_left(self, id: int, delta: int):
+        if delta < 0:
+            self._left_counts[id] -= 1
+        self.similarity += delta * id * self._right_counts.get(id, 0)
+        if delta > 0:
+            self._left_counts[id] = self._left_counts.get(id, 0) + 1
+
+    def _similarity_right(self, id: int, delta: int):
+        if delta < 0:
+            self._right_counts[id] -= 1
+        self.similarity += delta * id * self._left_counts.get(id, 0)
+        if delta > 0:
+            self._right_counts[id] = self._right_counts.get(id, 0) + 1
+
+    def _differences(self) -> np.ndarray:
+        values = np.array(self._values, dtype=np.int64)
+        return values + np.repeat(np.array(self._lazy, dtype=np.int64), self._block_size)[: len(values)]
+
+    def _rebuild(self, differences: np.ndarray):
+        self.distance = int(np.abs(differences).sum())
+        self._values = differences.tolist()
+        self._lazy = []
+        self._hist = []
+        self._nonneg = []
+
+        for start in range(0, len(differences), self._block_size):
+            block = differences[start : start + self._block_size]
+            values, counts = np.unique(block, return_counts=True)
+            self._lazy.append(0)
+            self._hist.append(dict(zip(values.tolist(), counts.tolist())))
+            self._nonneg.append(int((block >= 0).sum()))
+
+    def _add_range(self, left: int, right: int, sign: int):
+        # (left, right) moves the difference by +sign over [left, right)
+        # or by -sign over [right, left)
+        if left < right:
+            self._add(left, right, sign)
+        elif right < left:
+            self._add(right, left, -sign)
+
+    def _add(self, start: int, end: int, delta: int):
+        size = self._block_size
+        first, last = start // size, (end - 1) // size
+        if first == last:
+            for t in range(start, end):
+                self._add_one(t, delta)
+            return
+
+        for t in range(start, (first + 1) * size):
+            self._add_one(t, delta)
+        for block in range(first + 1, last):
+            self._add_block(block, delta)
+        for t in range(last * size, end):
+            self._add_one(t, delta)
+
+    def _add_one(self, t: int, delta: int):
+        block = t // self._block_size
+        hist = self._hist[block]
+        raw = self._values[t]
+        actual = raw + self._lazy[block]
+
+        self.distance += abs(actual + delta) - abs(actual)
+        if (actual >= 0) != (actual + delta >= 0):
+            self._nonneg[block] += 1 if delta > 0 else -1
 
-    return left, right
+        hist[raw] -= 1
+        hist[raw + delta] = hist.get(raw + delta, 0) + 1
+        self._values[t] = raw + delta
 
-def part1(input: TextIO):
-    left, right = parse_input(input)
-    diff_sum = sum(abs(x - y) for x, y in zip(left, right))
-    return diff_sum
+    def _add_block(self, block: int, delta: int):
+        length = min(self._block_size, self.max_id - block * self._block_size)
+        hist = self._hist[block]
+        lazy = self._lazy[block]
+        nonneg = self._nonneg[block]
 
-def part2(input: TextIO):
-    left, right = parse_input(input)
-    count_map = {}
-    for item in right:
-        count_map[item] = count_map.get(item, 0) + 1
+        if delta > 0:
+            # every non-negative difference grows, every negative one shrinks
+            self.distance += nonneg - (length - nonneg)
+            self._nonneg[block] = nonneg + hist.get(-1 - lazy, 0)
+        else:
+            zeros = hist.get(-lazy, 0)
+            positive = nonneg - zeros
+            self.distance += (length - positive) - positive
+            self._nonneg[block] = nonneg - zeros
 
-    return sum(item * count_map.get(item, 0) for item in left)
+        self._lazy[block] = lazy + delta
 
 
 if __name__ == "__main__":
@@ -36,10 +245,12 @@ if __name__ == "__main__":
                      "3   3")
 
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        columns = parse_input(test_io)
+        print(f"test part 1: {part1(columns)}")
+        print(f"test part 2: {part2(columns)}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        columns = parse_input(file)
+        print(f"part 1: {part1(columns)}")
+        print(f"part 2: {part2(columns)}")
@@ -1,45 +1,172 @@
 import io
+import os
 import sys
-from typing import TextIO
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import BinaryIO, Iterator, NamedTuple, TextIO
 
-def sign(x: int):
-    if x == 0:
-        return 0
-    return x // abs(x)
+import numpy as np
 
+def step_ok(before: int, after: int, direction: int) -> bool:
+    return 1 <= (after - before) * direction <= 3
 
-def is_safe(record):
-    seq_diffs = [a - b for a, b in zip(record[:-1], record[1:])]
-    diff_sign = sign(seq_diffs[0])
-    return all(abs(diff) <= 3 and abs(diff) >= 1 and sign(diff) == diff_sign for diff in seq_diffs)
 
+def is_safe(record) -> bool:
+    return is_safe_with_tolerance(record, 0)
 
-def parse_input(input: TextIO) -> ...:
+
+def is_safe_with_tolerance(record, max_removals: int) -> bool:
+    """
+    Checks if a report is safe once at most `max_removals` levels are removed.
+
+    The record is never copied. Walking left to right, the first bad step
+    between the last kept level `p` and level `i` can only be fixed by
+    removing `p` or `i`, so those are the only two branches explored there.
+    With one removal this is linear in the length of the record.
+    """
+    return any(
+        _is_safe_in_direction(record, max_removals, direction)
+        for direction in (1, -1)
+    )
+
+
+def _is_safe_in_direction(record, max_removals: int, direction: int) -> bool:
+    # each state is (next index, last kept index, removed indices, removals left)
+    stack: list[tuple[int, int, tuple[int, ...], int]] = [(0, -1, (), max_removals)]
+
+    while stack:
+        i, p, removed, left = stack.pop()
+
+        while i < len(record):
+            if p == -1 or step_ok(record[p], record[i], direction):
+                p, i = i, i + 1
+                continue
+
+            if left == 0:
+                break
+
+            # either drop level i and carry on from p ...
+            stack.append((i + 1, p, removed + (i,), left - 1))
+
+            # ... or drop p, and re-check i against the level kept before it
+            removed, left = removed + (p,), left - 1
+            p -= 1
+            while p >= 0 and p in removed:
+                p -= 1
+        else:
+            return True
+
+    return False
+
+
+class Reports(NamedTuple):
+    """All reports packed row-wise into a zero-padded matrix."""
+    levels: np.ndarray
+    lengths: np.ndarray
+
+
+def parse_input(input: TextIO) -> Reports:
     input.seek(0)
-    lines = input.readlines()
-    return [list(map(int, line.split())) for line in lines]
+    return parse_reports(input.read())
+
+
+def parse_reports(text: str | bytes) -> Reports:
+    rows = [line.split() for line in text.splitlines() if line.strip()]
+    lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+    width = int(lengths.max(initial=0))
+
+    levels = np.zeros((len(rows), width), dtype=np.int64)
+    # boolean indexing walks the matrix row-major, which is exactly the
+    # order the flattened levels come in
+    levels[np.arange(width) < lengths[:, None]] = np.array(
+        [level for row in rows for level in row], dtype=np.int64
+    )
+    return Reports(levels, lengths)
+
 
+def safe_mask(levels: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Checks every report at once. Padding past `lengths` is ignored."""
+    diffs = levels[:, 1:] - levels[:, :-1]
+    padding = np.arange(diffs.shape[1]) >= (lengths - 1)[:, None]
 
-def part1(input: TextIO):
-    records = parse_input(input)
-    num_safe_records = 0
+    increasing = ((diffs >= 1) & (diffs <= 3)) | padding
+    decreasing = ((diffs <= -1) & (diffs >= -3)) | padding
+    return increasing.all(axis=1) | decreasing.all(axis=1)
 
-    for record in records:
-        safe = is_safe(record)
-        num_safe_records += 1 if safe else 0
 
-    return num_safe_records
+def dampened_safe_mask(levels: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Checks every report at once, allowing a single level to be removed."""
+    safe = safe_mask(levels, lengths)
+    columns = np.arange(levels.shape[1] - 1)
 
+    for removed in range(levels.shape[1]):
+        # shift every level after `removed` one place left
+        shifted = np.where(columns < removed, levels[:, :-1], levels[:, 1:])
+        safe |= safe_mask(shifted, lengths - 1) & (removed < lengths)
 
-def part2(input: TextIO):
-    records = parse_input(input)
-    num_safe_records = 0
+    return safe
 
-    for record in records:
-        safe = any(is_safe(record[:i] + record[i+1:]) for i in range(len(record)))
-        num_safe_records += 1 if safe else 0
 
-    return num_safe_records
+def part1(reports: Reports):
+    return int(safe_mask(*reports).sum())
+
+
+def part2(reports: Reports):
+    return int(dampened_safe_mask(*reports).sum())
+
+
+def read_chunks(stream: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """Reads `stream` in blocks of roughly `chunk_size`, split at line boundaries."""
+    carry = b""
+    while block := stream.read(chunk_size):
+        end = block.rfind(b"\n")
+        if end == -1:
+            carry += block
+            continue
+
+        yield carry + block[: end + 1]
+        carry = block[end + 1 :]
+
+    if carry:
+        yield carry
+
+
+def count_safe_chunk(chunk: bytes) -> tuple[int, int]:
+    reports = parse_reports(chunk)
+    return part1(reports), part2(reports)
+
+
+def count_safe_streaming(
+    path: str,
+    chunk_size: int = 1 << 22,
+    workers: int | None = None,
+) -> tuple[int, int]:
+    """
+    Counts safe reports for both parts without loading the whole file.
+
+    Chunks are handed to a process pool, with at most two chunks per worker
+    in flight at once, so peak memory depends on `chunk_size` and `workers`
+    rather than on the size of the file.
+    """
+    workers = workers or os.cpu_count() or 1
+    totals = [0, 0]
+    pending: deque[Future[tuple[int, int]]] = deque()
+
+    def collect():
+        safe1, safe2 = pending.popleft().result()
+        totals[0] += safe1
+        totals[1] += safe2
+
+    with open(path, "rb") as file, ProcessPoolExecutor(workers) as pool:
+        for chunk in read_chunks(file, chunk_size):
+            if len(pending) >= 2 * workers:
+                collect()
+            pending.append(pool.submit(count_safe_chunk, chunk))
+
+        while pending:
+            collect()
+
+    return totals[0], totals[1]
 
 
 if __name__ == "__main__":
@@ -54,10 +181,18 @@ if __name__ == "__main__":
         )
 
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        reports = parse_input(test_io)
+        print(f"test part 1: {part1(reports)}")
+        print(f"test part 2: {part2(reports)}")
+        exit(0)
+
+    if "--stream" in sys.argv[2:]:
+        safe1, safe2 = count_safe_streaming(sys.argv[1])
+        print(f"part 1: {safe1}")
+        print(f"part 2: {safe2}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        reports = parse_input(file)
+        print(f"part 1: {part1(reports)}")
+        print(f"part 2: {part2(reports)}")
@@ -1,14 +1,25 @@
 import re
+import functools
 import io
+import itertools
+import mmap
+import os
 import sys
-from typing import TextIO
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, NamedTuple, TextIO
 
+import tracing
+from tracing import Level
 
-def part1(input: TextIO):
-    text = input.read()
 
+def parse_input(input: TextIO) -> str:
+    input.seek(0)
+    return input.read()
+
+
+def part1(text: str):
     total = 0
-    mul_re = re.compile(r"mul\((\d+),(\d+)\)")
+    mul_re = re.compile(r"mul\((\d{1,3}),(\d{1,3})\)")
     for item in mul_re.finditer(text):
         a, b = item.group(1), item.group(2)
         a, b = int(a), int(b)
@@ -17,44 +28,285 @@ def part1(input: TextIO):
     return total
 
 
-def part2(input: TextIO):
-    input.seek(0)
-    text = input.read()
-
+def part2(text: str):
     total = 0
-    mul_re = re.compile(r"(mul|don't|do)\((?:(\d+),(\d+))?\)")
+    mul_re = re.compile(r"mul\((\d{1,3}),(\d{1,3})\)|do\(\)|don't\(\)")
     enabled = True
+    trace_steps = tracing.enabled(Level.STEP)
 
     for item in mul_re.finditer(text):
-        cmd = item.group(1)
-        print(cmd)
-        if cmd == "don't":
+        cmd = item.group(0)
+        if trace_steps:
+            tracing.trace(Level.STEP, str, cmd)
+        if cmd == "don't()":
             enabled = False
             continue
-        if cmd == "do":
+        if cmd == "do()":
             enabled = True
             continue
 
-        assert cmd == "mul"
         if not enabled:
             continue
 
-        a, b = item.group(2), item.group(3)
+        a, b = item.group(1), item.group(2)
         a, b = int(a), int(b)
         total += a * b
 
     return total
 
 
+# the puzzle's instructions: mul(a,b) with 1-3 digit operands, do() and don't()
+INSTRUCTION_RE = re.compile(rb"mul\((\d{1,3}),(\d{1,3})\)|do\(\)|don't\(\)")
+
+# anything a chunk can end with that may still become an instruction
+PARTIAL_RE = re.compile(
+    rb"(?:m|mu|mul|mul\((?:\d{1,3}(?:,\d{0,3})?)?|d|do|do\(|don|don'|don't|don't\()\Z"
+)
+
+
+def scan_instructions(buffer, enabled: bool = True) -> tuple[int, int, bool, int]:
+    """
+    Runs the part 2 instruction set over `buffer` (any bytes-like object).
+
+    Returns:
+        A tuple of (total, enabled_total, enabled, end), where `total` sums every
+        mul (part 1), `enabled_total` only sums the enabled ones (part 2), `enabled`
+        is the state after the last instruction and `end` is where the last
+        instruction finished.
+    """
+    total = 0
+    enabled_total = 0
+    end = 0
+
+    for item in INSTRUCTION_RE.finditer(buffer):
+        cmd = item.group(0)
+        end = item.end()
+        if cmd == b"don't()":
+            enabled = False
+        elif cmd == b"do()":
+            enabled = True
+        else:
+            product = int(item.group(1)) * int(item.group(2))
+            total += product
+            if enabled:
+                enabled_total += product
+
+    return total, enabled_total, enabled, end
+
+
+def scan_stream(stream: BinaryIO, chunk_size: int = 1 << 20) -> tuple[int, int]:
+    """
+    Scans a binary stream chunk by chunk, returning the (part 1, part 2) totals.
+
+    Instructions never overlap, so any complete match inside a chunk is final.
+    Only the tail of a chunk that could still grow into an instruction is
+    carried over into the next one.
+    """
+    total = 0
+    enabled_total = 0
+    enabled = True
+    carry = b""
+
+    while block := stream.read(chunk_size):
+        buffer = carry + block
+        chunk_total, chunk_enabled_total, enabled, end = scan_instructions(buffer, enabled)
+        total += chunk_total
+        enabled_total += chunk_enabled_total
+
+        partial = PARTIAL_RE.search(buffer, end)
+        carry = buffer[partial.start() :] if partial else b""
+
+    return total, enabled_total
+
+
+def scan_file(path: str) -> tuple[int, int]:
+    """Scans a memory mapped file, returning the (part 1, part 2) totals."""
+    with open(path, "rb") as file:
+        if file.seek(0, io.SEEK_END) == 0:
+            return 0, 0
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            total, enabled_total, _, _ = scan_instructions(data)
+
+    return total, enabled_total
+
+
+_DIGIT_0, _DIGIT_9 = ord("0"), ord("9")
+_COMMA, _CLOSE = ord(","), ord(")")
+
+
+def _read_operand(data, i: int, end: int) -> tuple[int, int]:
+    """Reads 1-3 digits from `i`. Returns (value, index after the digits), or (-1, i)."""
+    value = 0
+    start = i
+    while i < end and i - start < 3 and _DIGIT_0 <= (c := data[i]) <= _DIGIT_9:
+        value = value * 10 + c - _DIGIT_0
+        i += 1
+
+    if i == start:
+        return -1, i
+    return value, i
+
+
+class SegmentSummary(NamedTuple):
+    """
+    The effect of a segment of memory, independent of the state it is entered in.
+
+    Summaries of neighbouring segments compose associatively with `combine`.
+    """
+    total: int
+    if_enabled: int
+    if_disabled: int
+    exit_state: bool | None
+
+
+def combine(left: SegmentSummary, right: SegmentSummary) -> SegmentSummary:
+    """Summarises `left` followed directly by `right`."""
+    def continue_from(entered: bool) -> int:
+        state = entered if left.exit_state is None else left.exit_state
+        return right.if_enabled if state else right.if_disabled
+
+    return SegmentSummary(
+        left.total + right.total,
+        left.if_enabled + continue_from(True),
+        left.if_disabled + continue_from(False),
+        left.exit_state if right.exit_state is None else right.exit_state,
+    )
+
+
+def summarize_segment(data, start: int = 0, stop: int | None = None) -> SegmentSummary:
+    """
+    Hand written alternative to `scan_instructions`, following the puzzle's
+    definition of `mul(a,b)` with 1-3 digit operands, `do()` and `don't()`.
+
+    `data` may be bytes, a bytearray or an mmap. Rather than matching from every
+    byte, the scan jumps between the next "mul(", "do()" and "don't()" with
+    `find`, then runs the operand DFA over single bytes read as ints, so that
+    no match objects or substrings are created.
+
+    Only instructions starting in [start, stop) are counted, but they may finish
+    past `stop`, so neighbouring segments never split an instruction.
+    """
+    end = len(data)
+    stop = end if stop is None else min(stop, end)
+    total = 0
+    if_enabled = 0
+    if_disabled = 0
+    state: bool | None = None
+
+    def find(token: bytes, start: int) -> int:
+        index = data.find(token, start)
+        return stop if index == -1 or index >= stop else index
+
+    next_mul = find(b"mul(", start)
+    next_do = find(b"do()", start)
+    next_dont = find(b"don't()", start)
+
+    while True:
+        if next_mul < next_do and next_mul < next_dont:
+            a, i = _read_operand(data, next_mul + 4, end)
+            if a != -1 and i < end and data[i] == _COMMA:
+                b, i = _read_operand(data, i + 1, end)
+                if b != -1 and i < end and data[i] == _CLOSE:
+                    total += a * b
+                    if state is None:
+                        if_enabled += a * b
+                    elif state:
+                        if_enabled += a * b
+                        if_disabled += a * b
+
+            next_mul = find(b"mul(", next_mul + 4)
+
+        elif next_do < next_dont:
+            state = True
+            next_do = find(b"do()", next_do + 4)
+
+        elif next_dont != stop:
+            state = False
+            next_dont = find(b"don't()", next_dont + 7)
+
+        else:
+            return SegmentSummary(total, if_enabled, if_disabled, state)
+
+
+def tokenize_instructions(data, enabled: bool = True) -> tuple[int, int, bool]:
+    """
+    Runs `summarize_segment` over the whole of `data`.
+
+    Returns:
+        A tuple of (total, enabled_total, enabled), as in `scan_instructions`.
+    """
+    summary = summarize_segment(data)
+    enabled_total = summary.if_enabled if enabled else summary.if_disabled
+    if summary.exit_state is not None:
+        enabled = summary.exit_state
+
+    return summary.total, enabled_total, enabled
+
+
+def _summarize_file_segment(path: str, start: int, stop: int) -> SegmentSummary:
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return summarize_segment(data, start, stop)
+
+
+def scan_file_parallel(path: str, workers: int | None = None, segments: int | None = None) -> tuple[int, int]:
+    """
+    Scans a file in segments across a process pool, returning the (part 1, part 2) totals.
+
+    Every worker maps the file itself, summarises its segment, and the summaries
+    are combined left to right, which matches the sequential answer exactly.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0, 0
+
+    workers = workers or os.cpu_count() or 1
+    segments = min(segments or 4 * workers, size)
+    bounds = [size * i // segments for i in range(segments + 1)]
+
+    with ProcessPoolExecutor(workers) as pool:
+        summaries = pool.map(
+            _summarize_file_segment,
+            itertools.repeat(path),
+            bounds[:-1],
+            bounds[1:],
+        )
+        summary = functools.reduce(combine, summaries)
+
+    return summary.total, summary.if_enabled
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         test_text = "xmul(2,4)&mul[3,7]!^don't()_mul(5,5)+mul(32,64](mul(11,8)undo()?mul(8,5))"
 
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        parsed = parse_input(test_io)
+        print(f"test part 1: {part1(parsed)}")
+        print(f"test part 2: {part2(parsed)}")
+        exit(0)
+
+    if "--parallel" in sys.argv[2:]:
+        total, enabled_total = scan_file_parallel(sys.argv[1])
+        print(f"part 1: {total}")
+        print(f"part 2: {enabled_total}")
+        exit(0)
+
+    if "--stream" in sys.argv[2:]:
+        with open(sys.argv[1], "rb") as file:
+            total, enabled_total = scan_stream(file)
+        print(f"part 1: {total}")
+        print(f"part 2: {enabled_total}")
+        exit(0)
+
+    if "--mmap" in sys.argv[2:]:
+        total, enabled_total = scan_file(sys.argv[1])
+        print(f"part 1: {total}")
+        print(f"part 2: {enabled_total}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        parsed = parse_input(file)
+        print(f"part 1: {part1(parsed)}")
+        print(f"part 2: {part2(parsed)}")
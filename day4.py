@@ -1,62 +1,257 @@
 import io
 import sys
-from contextlib import suppress
-from typing import TextIO
+from collections import deque
+from typing import Iterable, Iterator, NamedTuple, TextIO
 
+import numpy as np
 
-def parse_input(input: TextIO) -> ...:
+import tracing
+from tracing import Level
+
+# right, down, down-right and up-right; reversed words cover the other four
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (-1, 1))
+
+
+def parse_input(input: TextIO) -> np.ndarray:
     input.seek(0)
-    lines = input.readlines()
-    return [line.strip() for line in lines]
+    lines = [line.strip() for line in input.readlines()]
+    lines = [line for line in lines if line]
+
+    grid = np.frombuffer("".join(lines).encode(), dtype=np.uint8)
+    return grid.reshape(len(lines), -1) if lines else grid.reshape(0, 0)
+
+
+def word_mask(grid: np.ndarray, word: bytes, dy: int, dx: int) -> np.ndarray:
+    """
+    Marks every start cell from which `word` reads in direction (dy, dx).
 
+    Each letter compares a shifted view of the grid, so the mask covers only the
+    start cells whose whole word fits inside the grid.
+    """
+    height, width = grid.shape
+    span = len(word) - 1
+    row_start, row_end = max(0, -span * dy), height - max(0, span * dy)
+    col_start, col_end = max(0, -span * dx), width - max(0, span * dx)
+    if row_end <= row_start or col_end <= col_start:
+        return np.zeros((0, 0), dtype=bool)
 
-def part1(input: TextIO):
-    grid = parse_input(input)
-    count = 0
+    mask = np.ones((row_end - row_start, col_end - col_start), dtype=bool)
+    for k, letter in enumerate(word):
+        view = grid[
+            row_start + k * dy : row_end + k * dy,
+            col_start + k * dx : col_end + k * dx,
+        ]
+        mask &= view == letter
 
-    for sy in range(len(grid)):
-        for sx in range(len(grid[0])):
-            chunk = [line[sx:sx+4] for line in grid[sy:sy+4]]
+    return mask
 
-            horz = chunk[0]
-            vert = "".join(line[0] for line in chunk)
-            checks = [horz, vert]
 
-            with suppress(IndexError):
-                diag1 = "".join(chunk[i  ][i  ] for i in range(4))
-                checks.append(diag1)
+def count_word(grid: np.ndarray, word: bytes) -> int:
+    """Counts `word` in all eight directions."""
+    words = {word, word[::-1]}
+    return sum(
+        int(word_mask(grid, candidate, dy, dx).sum())
+        for candidate in words
+        for dy, dx in LINE_DIRECTIONS
+    )
 
-            with suppress(IndexError):
-                diag2 = "".join(chunk[3-i][i  ] for i in range(4))
-                checks.append(diag2)
 
-            # print(checks)
-            count += sum(1 for line in checks if line == "XMAS" or line == "SAMX")
+def stream_counts(input: TextIO) -> Iterator[tuple[int, int, int]]:
+    """
+    Counts XMAS and X-MAS while reading the grid one line at a time.
+
+    Only the last four rows are kept. Once a row is read, every match whose
+    lowest row it is gets counted, and (row, part 1 total, part 2 total) is
+    yielded, so memory is proportional to the width of the grid.
+    """
+    window: deque[np.ndarray] = deque(maxlen=len(b"XMAS"))
+    xmas = x_mas = 0
+    width = -1
+
+    for row, line in enumerate(line for line in map(str.strip, input) if line):
+        if width == -1:
+            width = len(line)
+        assert len(line) == width, "all rows must be the same width"
+
+        window.append(np.frombuffer(line.encode(), dtype=np.uint8))
+
+        xmas += sum(
+            int(word_mask(window[-1][None, :], word, 0, 1).sum())
+            for word in (b"XMAS", b"SAMX")
+        )
+        if len(window) == 4:
+            rows = np.stack(window)
+            xmas += sum(
+                int(word_mask(rows, word, dy, dx).sum())
+                for word in (b"XMAS", b"SAMX")
+                for dy, dx in LINE_DIRECTIONS[1:]
+            )
+        if len(window) >= 3:
+            x_mas += count_x_mas(np.stack(list(window)[-3:]))
+
+        yield row, xmas, x_mas
 
+
+def part1(grid: np.ndarray):
+    count = count_word(grid, b"XMAS")
+    tracing.trace(Level.SUMMARY, "{} XMAS found".format, count)
     return count
 
 
+def count_x_mas(grid: np.ndarray) -> int:
+    if grid.shape[0] < 3 or grid.shape[1] < 3:
+        return 0
+
+    M, A, S = b"MAS"
+    top_left, top_right = grid[:-2, :-2], grid[:-2, 2:]
+    bottom_left, bottom_right = grid[2:, :-2], grid[2:, 2:]
 
-def part2(input: TextIO):
-    grid = parse_input(input)
-    count = 0
+    def is_mas(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return ((a == M) & (b == S)) | ((a == S) & (b == M))
 
-    print(len(grid) - 2)
-    for sy in range(len(grid) - 2):
-        for sx in range(len(grid[0]) - 2):
-            diag1 = "".join(grid[sy + i][sx + i] for i in range(3))
-            diag2 = "".join(grid[sy + 2 - i][sx + i] for i in range(3))
+    mask = (grid[1:-1, 1:-1] == A) & is_mas(top_left, bottom_right) & is_mas(bottom_left, top_right)
+    return int(mask.sum())
 
-            print(diag1, diag2, end="")
-            if diag1 in ["MAS", "SAM"] and diag2 in ["MAS", "SAM"]:
-                count += 1
-                print(" YES")
-            else:
-                print("")
 
+def part2(grid: np.ndarray):
+    count = count_x_mas(grid)
+    tracing.trace(Level.SUMMARY, "{} X-MAS found".format, count)
     return count
 
 
+class WordMatch(NamedTuple):
+    """A word reading from (row, col) in direction (dy, dx)."""
+    row: int
+    col: int
+    dy: int
+    dx: int
+
+
+class SearchResult(NamedTuple):
+    counts: dict[str, int]
+    positions: dict[str, list[WordMatch]] | None
+
+
+def grid_lines(grid: np.ndarray) -> Iterator[tuple[bytes, int, int, int, int]]:
+    """
+    Yields every row, column, diagonal and anti-diagonal of the grid as
+    (line, start_row, start_col, dy, dx).
+    """
+    height, width = grid.shape
+
+    for row in range(height):
+        yield grid[row].tobytes(), row, 0, 0, 1
+
+    for col in range(width):
+        yield grid[:, col].tobytes(), 0, col, 1, 0
+
+    flipped = grid[::-1]
+    for offset in range(-(height - 1), width):
+        row, col = max(0, -offset), max(0, offset)
+        yield grid.diagonal(offset).tobytes(), row, col, 1, 1
+        # the same diagonal of the upside down grid, read bottom to top
+        yield flipped.diagonal(offset).tobytes(), height - 1 - row, col, -1, 1
+
+
+class WordSearch:
+    """
+    Counts many words at once in every direction of a grid.
+
+    Builds an Aho-Corasick automaton over the words and their reverses, then
+    streams each row, column and diagonal through it once, so the cost is
+    linear in the grid size plus the number of matches, whatever the number
+    of words. Like `count_word`, palindromes are counted once per line.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = list(dict.fromkeys(words))
+        assert all(self.words), "words must not be empty"
+
+        # every pattern maps back to (word index, reads backwards)
+        self._patterns: list[tuple[int, bool]] = []
+        self._lengths: list[int] = []
+        self._transitions: list[dict[int, int]] = [{}]
+        outputs: list[list[int]] = [[]]
+
+        for index, word in enumerate(self.words):
+            encoded = word.encode()
+            variants = [(encoded, False)]
+            if encoded[::-1] != encoded:
+                variants.append((encoded[::-1], True))
+
+            for pattern, backwards in variants:
+                state = 0
+                for byte in pattern:
+                    if byte not in self._transitions[state]:
+                        self._transitions.append({})
+                        outputs.append([])
+                        self._transitions[state][byte] = len(self._transitions) - 1
+                    state = self._transitions[state][byte]
+
+                outputs[state].append(len(self._patterns))
+                self._patterns.append((index, backwards))
+                self._lengths.append(len(pattern))
+
+        self._build_links(outputs)
+
+    def _build_links(self, outputs: list[list[int]]):
+        """Adds failure transitions, making each state's transitions complete."""
+        alphabet = {byte for transitions in self._transitions for byte in transitions}
+        fail = [0] * len(self._transitions)
+        queue = deque(self._transitions[0].values())
+
+        while queue:
+            state = queue.popleft()
+            outputs[state].extend(outputs[fail[state]])
+
+            for byte in alphabet:
+                child = self._transitions[state].get(byte)
+                fallback = self._transitions[fail[state]].get(byte, 0)
+                if child is None:
+                    if fallback != 0:
+                        self._transitions[state][byte] = fallback
+                else:
+                    fail[child] = fallback
+                    queue.append(child)
+
+        self._outputs = [tuple(output) for output in outputs]
+
+    def search(self, grid: np.ndarray, positions: bool = False) -> SearchResult:
+        transitions = self._transitions
+        outputs = self._outputs
+        pattern_counts = [0] * len(self._patterns)
+        found: dict[str, list[WordMatch]] | None = {word: [] for word in self.words} if positions else None
+
+        for line, row, col, dy, dx in grid_lines(grid):
+            state = 0
+            for i, byte in enumerate(line):
+                state = transitions[state].get(byte, 0)
+                if not outputs[state]:
+                    continue
+
+                for pattern in outputs[state]:
+                    pattern_counts[pattern] += 1
+                    if found is not None:
+                        self._record(found, pattern, i, row, col, dy, dx)
+
+        counts = dict.fromkeys(self.words, 0)
+        for pattern, count in enumerate(pattern_counts):
+            counts[self.words[self._patterns[pattern][0]]] += count
+
+        return SearchResult(counts, found)
+
+    def _record(self, found: dict[str, list[WordMatch]], pattern: int, end: int, row: int, col: int, dy: int, dx: int):
+        index, backwards = self._patterns[pattern]
+        start = end - self._lengths[pattern] + 1
+
+        if backwards:
+            # the word itself starts at the end of the match and reads backwards
+            match = WordMatch(row + end * dy, col + end * dx, -dy, -dx)
+        else:
+            match = WordMatch(row + start * dy, col + start * dx, dy, dx)
+        found[self.words[index]].append(match)
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         test_text = (
@@ -76,10 +271,21 @@ if __name__ == "__main__":
         )
 
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        parsed = parse_input(test_io)
+        print(f"test part 1: {part1(parsed)}")
+        print(f"test part 2: {part2(parsed)}")
+        exit(0)
+
+    if "--stream" in sys.argv[2:]:
+        with open(sys.argv[1]) as file:
+            xmas = x_mas = 0
+            for _, xmas, x_mas in stream_counts(file):
+                pass
+        print(f"part 1: {xmas}")
+        print(f"part 2: {x_mas}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        parsed = parse_input(file)
+        print(f"part 1: {part1(parsed)}")
+        print(f"part 2: {part2(parsed)}")
@@ -1,119 +1,233 @@
+import functools
+import graphlib
 import io
 import sys
-from typing import TextIO
+from collections import OrderedDict
+from typing import NamedTuple, TextIO
 
+import numpy as np
 
-def parse_input(input: TextIO) -> tuple[dict[int, list[int]], list[list[int]]]:
+import tracing
+from tracing import Level
+
+
+Rules = set[tuple[int, int]]
+
+
+def parse_input(input: TextIO) -> tuple[Rules, list[list[int]]]:
+    """Returns the (before, after) page rules, and the updates."""
     input.seek(0)
-    rules = {}
-    rev_rules = {}
+    rules: Rules = set()
     updates = []
-    
-    while (line := input.readline()) != "\n":
-        line = line.strip()
+
+    while (line := input.readline().strip()):
         before, bar, after = line.partition("|")
         assert bar == "|"
-
-        before_int, after_int = int(before), int(after)
-        if after_int not in rules:
-            rules[after_int] = []
-        if before_int not in rev_rules:
-            rev_rules[before_int] = []
-
-        rules[after_int].append(before_int)
-        rev_rules[before_int].append(after_int)
+        rules.add((int(before), int(after)))
 
     while (line := input.readline()):
         updates.append([int(x) for x in line.split(",")])
 
-    return rules, rev_rules, updates
-
-
-def check_violations(update: list[int], rules: dict[int, list[int]]) -> list[int]:
-    ...
-
-
-def part1(input: TextIO):
-    rules, _, updates = parse_input(input)
-
-    # we have rules such as
-    # 97 must come before 75
-    #
-    # t.f. we run through the input list
-    # If we see 75 then we ensure we don't see
-    # 97 anywhere in the list
-    total = 0
-
-    for update in updates:
-        cannot_see = set()
-        for page in update:
-            if page in cannot_see:
-                break
-
-            if page not in rules:
-                continue
-
-            cannot_see.update(rules[page])
+    return rules, updates
+
+
+def is_ordered(update: list[int], rules: Rules) -> bool:
+    # a page may not be followed by any page that must come before it
+    return not any(
+        (update[j], update[i]) in rules
+        for i in range(len(update))
+        for j in range(i + 1, len(update))
+    )
+
+
+def reorder(update: list[int], rules: Rules) -> list[int]:
+    def compare(a: int, b: int) -> int:
+        if (a, b) in rules:
+            return -1
+        if (b, a) in rules:
+            return 1
+        return 0
+
+    return sorted(update, key=functools.cmp_to_key(compare))
+
+
+def rule_matrix(rules: Rules, min_size: int = 0) -> np.ndarray:
+    """
+    Dense precedence matrix, where [before, after] is set for every rule.
+
+    It covers every page named in a rule, and at least `min_size` pages, so
+    pages that only appear in updates can be looked up too.
+    """
+    size = max(max((max(rule) for rule in rules), default=0) + 1, min_size)
+    matrix = np.zeros((size, size), dtype=bool)
+    if rules:
+        before, after = np.array(sorted(rules)).T
+        matrix[before, after] = True
+    return matrix
+
+
+def pack_updates(updates: list[list[int]]) -> tuple[np.ndarray, np.ndarray]:
+    """Packs updates row-wise into a zero-padded matrix plus their lengths."""
+    lengths = np.fromiter(map(len, updates), dtype=np.int64, count=len(updates))
+    width = int(lengths.max(initial=0))
+
+    pages = np.zeros((len(updates), width), dtype=np.int64)
+    pages[np.arange(width) < lengths[:, None]] = [page for update in updates for page in update]
+    return pages, lengths
+
+
+def validate_batch(
+    matrix: np.ndarray,
+    pages: np.ndarray,
+    lengths: np.ndarray,
+    max_cells: int = 1 << 24,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Validates every packed update at once.
+
+    For every ordered pair of positions i < j, an update is broken if a rule
+    says its page at j must come before its page at i. Rows are processed in
+    batches of at most `max_cells` pair lookups to keep memory in check.
+
+    Returns:
+        A tuple of (valid mask, middle page of every update).
+    """
+    count, width = pages.shape
+    first, second = np.triu_indices(width, 1)
+    valid = np.ones(count, dtype=bool)
+    rows_per_batch = max(1, max_cells // max(1, len(first)))
+
+    for start in range(0, count, rows_per_batch):
+        batch = pages[start : start + rows_per_batch]
+        in_update = second < lengths[start : start + rows_per_batch, None]
+        broken = matrix[batch[:, second], batch[:, first]] & in_update
+        valid[start : start + rows_per_batch] = ~broken.any(axis=1)
+
+    middles = pages[np.arange(count), lengths // 2]
+    return valid, middles
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class ReorderCache:
+    """
+    Bounded LRU cache of correct orderings, keyed by the set of pages in an update.
+
+    If the rules as a whole are acyclic, every page gets a global rank once up
+    front and a candidate ordering is just a sort by rank. Otherwise each
+    page's rank is the number of pages in the update that must come before it.
+    Either way, the ordering only counts if the rules restricted to the
+    update's pages form a total order. Page sets without one are cached as
+    None, so that check isn't repeated, and fall back to the comparator sort.
+    """
+
+    def __init__(self, rules: Rules, maxsize: int = 1024):
+        assert maxsize > 0
+        self.rules = rules
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._orderings: OrderedDict[frozenset[int], tuple[int, ...] | None] = OrderedDict()
+        self._global_ranks = self._rank_globally(rules)
+
+    @staticmethod
+    def _rank_globally(rules: Rules) -> dict[int, int] | None:
+        sorter = graphlib.TopologicalSorter()
+        for before, after in rules:
+            sorter.add(after, before)
+
+        try:
+            return {page: rank for rank, page in enumerate(sorter.static_order())}
+        except graphlib.CycleError:
+            return None
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._orderings))
+
+    def ordering(self, update: list[int]) -> tuple[int, ...] | None:
+        """The correct ordering of the update's pages, or None if it isn't unique."""
+        pages = frozenset(update)
+        if len(pages) != len(update):
+            return None
+
+        if pages in self._orderings:
+            self.hits += 1
+            self._orderings.move_to_end(pages)
+            return self._orderings[pages]
+
+        self.misses += 1
+        ordering = self._compute_ordering(pages)
+        self._orderings[pages] = ordering
+        if len(self._orderings) > self.maxsize:
+            self._orderings.popitem(last=False)
+
+        return ordering
+
+    def _compute_ordering(self, pages: frozenset[int]) -> tuple[int, ...] | None:
+        if self._global_ranks is not None:
+            ordering = tuple(sorted(pages, key=lambda page: self._global_ranks.get(page, -1)))
         else:
-            middle = update[len(update) // 2]
-            total += middle
-
-    return total
-
-
-def part2(input: TextIO):
-    _ = parse_input(input)
-    rules, rev_rules, updates = parse_input(input)
-
-    # how to find correct ordering?
-    # 1. we need to find violations
-    # 2. 
-    #   we should then figure out if *directly* fixing these
-    #   violations will break our rules
-    # 3. if so, we need to change the order in which fixes are applied ...
-    # 
-    # -- how to order the fixes correctly --
-    # we know:
-    # - all fixes should move items backwards in a list
-    # - moving an item backwards may violate other rules involving the moved item
-    #   - if we *directly* fix the violation, we should *never* be breaking any other rules,
-    #     otherwise the update we have is malformed (can never be correct)
-    #   - t.f. the only thing we have to care about is the order / placement of corrections
-
-
+            ranks = {
+                page: sum((other, page) in self.rules for other in pages)
+                for page in pages
+            }
+            if sorted(ranks.values()) != list(range(len(pages))):
+                return None
+            ordering = tuple(sorted(pages, key=ranks.__getitem__))
+
+        # the order is correct if no rule runs backwards through it, and unique
+        # if a rule also pins down every adjacent pair
+        if not all((before, after) in self.rules for before, after in zip(ordering, ordering[1:])):
+            return None
+        if not is_ordered(list(ordering), self.rules):
+            return None
+        return ordering
+
+    def is_ordered(self, update: list[int]) -> bool:
+        ordering = self.ordering(update)
+        if ordering is None:
+            return is_ordered(update, self.rules)
+        return tuple(update) == ordering
+
+    def reorder(self, update: list[int]) -> list[int]:
+        ordering = self.ordering(update)
+        if ordering is None:
+            return reorder(update, self.rules)
+        return list(ordering)
+
+
+def part1(parsed: tuple[Rules, list[list[int]]]):
+    rules, updates = parsed
+    pages, lengths = pack_updates(updates)
+    matrix = rule_matrix(rules, int(pages.max(initial=0)) + 1)
+    valid, middles = validate_batch(matrix, pages, lengths)
+    return int(middles[valid].sum())
+
+
+def part2(parsed: tuple[Rules, list[list[int]]]):
+    rules, updates = parsed
+    pages, lengths = pack_updates(updates)
+    matrix = rule_matrix(rules, int(pages.max(initial=0)) + 1)
+    valid, _ = validate_batch(matrix, pages, lengths)
+    cache = ReorderCache(rules)
     total = 0
 
-    for update in updates:
-        cannot_see = set()
-        violations = []
+    for update, ordered in zip(updates, valid):
+        if ordered:
+            continue
 
-        for page in update:
-            if page in cannot_see:
-                violations.append(page)
-
-            if page not in rules:
-                continue
-
-            cannot_see.update(rules[page])
-
-        if len(violations) > 0:
-            new_update = update.copy()
-
-            for violated in violations:
-                befores = rev_rules[violated]
-                earliest_index = min(update.index(before) for before in befores if before in update)
-                old_index = update.index(violated)
-                assert earliest_index < old_index
-
-                new_update[old_index], new_update[earliest_index] = new_update[earliest_index], new_update[old_index]
-            
-            print(new_update, f"(mv {violations})")
-        else:
-            print(update)
+        new_update = cache.reorder(update)
+        tracing.trace(Level.STEP, "{} -> {}".format, update, new_update)
+        total += new_update[len(new_update) // 2]
 
+    tracing.trace(Level.SUMMARY, str, cache.cache_info())
     return total
 
-
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         test_text = (
@@ -148,10 +262,12 @@ if __name__ == "__main__":
         )
 
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        parsed = parse_input(test_io)
+        print(f"test part 1: {part1(parsed)}")
+        print(f"test part 2: {part2(parsed)}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        parsed = parse_input(file)
+        print(f"part 1: {part1(parsed)}")
+        print(f"part 2: {part2(parsed)}")
@@ -1,18 +1,24 @@
+import bisect
 import io
+import itertools
+import os
 import re
+import struct
 import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import colorama
+import numpy as np
 from typing import NamedTuple, TextIO
-colorama.init()
 
-ROTATE_MAP = {
-    ord("^"): ord(">"),
-    ord(">"): ord("v"),
-    ord("v"): ord("<"),
-    ord("<"): ord("^"),
-}
+import tracing
+from tracing import Level
+
+colorama.init()
 
-def parse_input(input: TextIO) -> tuple[bytearray, int]:
+def parse_input(input: TextIO) -> tuple[bytes, int]:
     input.seek(0)
     lines = [line.strip() for line in input.readlines()]
 
@@ -20,61 +26,168 @@ def parse_input(input: TextIO) -> tuple[bytearray, int]:
     map_width = len(lines[0])
     assert all(len(line) == map_width for line in lines)
 
-    return bytearray("".join(lines).encode()), map_width
+    return "".join(lines).encode(), map_width
 
 
-def print_map(map: bytearray, width: int):
-    for i in range(0, len(map), width):
-        print(map[i : i + width].decode())
+def format_map(map: bytes, width: int) -> str:
+    return "\n".join(map[i : i + width].decode() for i in range(0, len(map), width))
 
-def print_colored_map(map: list[int], width: int):
-    for i in range(0, len(map)):
-        color = map[i] >> 8
-        if color != 0:
-            print(f"{colorama.ansi.code_to_chars(color)}{chr(map[i] & 0x7f)}{colorama.Fore.RESET}", end="")
-        else:
-            print(chr(map[i]), end="")
-        if (i + 1) % width == 0:
-            print()
+class FrameRenderer:
+    """
+    Renders maps with per-cell colours into ANSI text, one string per frame.
 
-def draw_path_on_colored_map(map: list[int], width: int, path: list[int], color: int):
-    window: list[int] = []
+    Each frame is built in a single buffer, and colour escapes are only
+    emitted where the colour changes along a row, rather than around every
+    cell. With `diff`, every frame after the first only repaints the cells
+    that changed since the previous one, using absolute cursor moves, so a
+    sequence of frames animates in place on a terminal.
+    """
 
-    for upcoming_index in [*path]:
-        if len(window) != 3:
-            window.append(upcoming_index)
-            continue
+    def __init__(self, diff: bool = False):
+        self.diff = diff
+        self._header_lines = -1
+        self._chars = b""
+        self._colors = b""
+
+    def render(self, chars: bytes, colors: bytes, width: int, header: str = "") -> str:
+        """
+        Renders `chars` with `colors`, an ANSI colour code per cell (0 for none),
+        below the optional `header` lines.
+        """
+        prefix = header + "\n" if header else ""
+        if not self.diff:
+            return prefix + self._render_cells(chars, colors, width, 0, len(chars))
+
+        header_lines = prefix.count("\n")
+        if header_lines != self._header_lines or len(chars) != len(self._chars):
+            text = (
+                colorama.ansi.clear_screen()
+                + colorama.Cursor.POS(1, 1)
+                + prefix
+                + self._render_cells(chars, colors, width, 0, len(chars))
+            )
+        else:
+            text = self._render_changes(chars, colors, width, header, header_lines)
+
+        self._header_lines = header_lines
+        self._chars = bytes(chars)
+        self._colors = bytes(colors)
+        return text
+
+    @staticmethod
+    def _runs(colors: np.ndarray, start: int, stop: int, width: int) -> np.ndarray:
+        """Starts of every run of equal colour in [start, stop), split at row ends."""
+        cells = colors[start:stop]
+        changes = np.flatnonzero(cells[1:] != cells[:-1]) + 1 + start
+        row_starts = np.arange((start // width + 1) * width, stop, width)
+        return np.union1d(np.union1d(changes, row_starts), [start])
+
+    def _render_cells(self, chars: bytes, colors: bytes, width: int, start: int, stop: int) -> str:
+        colors_array = np.frombuffer(colors, dtype=np.uint8)
+        runs = self._runs(colors_array, start, stop, width).tolist()
+
+        parts: list[str] = []
+        current = 0
+        for run_start, run_stop in zip(runs, runs[1:] + [stop]):
+            if run_start != start and run_start % width == 0:
+                if current:
+                    parts.append(colorama.Fore.RESET)
+                    current = 0
+                parts.append("\n")
+
+            color = colors[run_start]
+            if color != current:
+                parts.append(colorama.ansi.code_to_chars(color) if color else colorama.Fore.RESET)
+                current = color
+            parts.append(chars[run_start:run_stop].decode())
+
+        if current:
+            parts.append(colorama.Fore.RESET)
+        return "".join(parts)
+
+    def _render_changes(self, chars: bytes, colors: bytes, width: int, header: str, header_lines: int) -> str:
+        parts = [colorama.Cursor.POS(1, 1)]
+        for line in header.splitlines():
+            parts.append(line + colorama.ansi.clear_line(0) + "\n")
+
+        changed = np.flatnonzero(
+            (np.frombuffer(chars, dtype=np.uint8) != np.frombuffer(self._chars, dtype=np.uint8))
+            | (np.frombuffer(colors, dtype=np.uint8) != np.frombuffer(self._colors, dtype=np.uint8))
+        )
+        if len(changed):
+            # repaint contiguous changed cells within a row as one span
+            breaks = np.flatnonzero((np.diff(changed) != 1) | (np.diff(changed // width) != 0)) + 1
+            for span in np.split(changed, breaks):
+                start, stop = int(span[0]), int(span[-1]) + 1
+                row, column = divmod(start, width)
+                parts.append(colorama.Cursor.POS(column + 1, header_lines + row + 1))
+                parts.append(self._render_cells(chars, colors, width, start, stop))
+
+        height = len(chars) // width
+        parts.append(colorama.Cursor.POS(1, header_lines + height))
+        return "".join(parts)
+
+
+class Path(NamedTuple):
+    cells: list[int]
+    color: int
+    # closed paths lead from their last cell back to their first
+    closed: bool = False
+
+
+def draw_path(chars: bytearray, colors: bytearray, path: Path):
+    """Draws every cell of `path` onto `chars` with box characters, in its colour."""
+    cells = path.cells
+    count = len(cells)
+
+    for i, index in enumerate(cells):
+        if path.closed:
+            prev_index, next_index = cells[i - 1], cells[(i + 1) % count]
+        else:
+            prev_index = cells[i - 1] if i > 0 else None
+            next_index = cells[i + 1] if i + 1 < count else None
 
-        prev_index, index, next_index = window
-        if map[index] != ord("."):
+        if prev_index is None and next_index is None:
             target_char = "+"
-        elif index - prev_index == next_index - index:
-            abs_diff = abs(next_index - index)
+        elif prev_index is None or next_index is None or index - prev_index == next_index - index:
+            # straight through, or the end of an open path
+            neighbour = next_index if prev_index is None else prev_index
+            abs_diff = abs(index - neighbour)
             if abs_diff == 1:
                 target_char = "-"
             else:
                 target_char = "|"
         else:
             target_char = "+"
-        
-        map[index] = ord(target_char) + (color << 8)
-        window = [index, next_index, upcoming_index]
 
+        # paths crossing each other, or anything else on the map, make a corner
+        if chars[index] not in (ord("."), ord(target_char)):
+            target_char = "+"
+
+        chars[index] = ord(target_char)
+        colors[index] = path.color
 
 
-def print_path(map: bytearray, width: int, *paths: tuple[list[int], int]):
-    map_to_print = list(map)
+def format_path(
+    map: bytes,
+    width: int,
+    *paths: Path,
+    header: str = "",
+    renderer: FrameRenderer | None = None,
+) -> str:
+    chars = bytearray(map)
+    colors = bytearray(len(map))
 
-    for path, color in paths:
-        draw_path_on_colored_map(map_to_print, width, path, color)
+    for path in paths:
+        draw_path(chars, colors, path)
 
-    print_colored_map(map_to_print, width)
+    return (renderer or FrameRenderer()).render(chars, colors, width, header)
 
 
 GUARD_RE = re.compile(b"[\\^><v]")
 
 
-def find_guard(map: bytearray) -> int | None:
+def find_guard(map: bytes) -> int | None:
     match = GUARD_RE.search(map)
     if match is None:
         return None
@@ -82,171 +195,658 @@ def find_guard(map: bytearray) -> int | None:
     return match.start()
 
 
-def get_step_size(guard_char: int, width: int):
-    STEP_MAP = {
-        ord("^"): -width,
-        ord(">"): 1,
-        ord("v"): width,
-        ord("<"): -1,
-    }
-    assert guard_char in STEP_MAP
-    return STEP_MAP[guard_char]
+# guard directions, in the order the guard turns through them
+DIRECTION_CHARS = b"^>v<"
+NO_OBSTACLE = -1
 
-def peek_guard(guard_index: int, map: bytearray, width: int) -> int | None:
-    step_size = get_step_size(map[guard_index], width)
-    next_index = guard_index + step_size
+# maps every map byte to 1 for an obstacle and 0 for free floor or the guard
+OBSTACLE_BYTES = bytes(0 if char in b".^>v<" else 1 for char in range(256))
 
-    if next_index >= len(map) or next_index < 0 or (abs(step_size) == 1 and (guard_index // width) != (next_index // width)):
-        return
-    
-    return next_index
 
-def step_guard(guard_index: int, map: bytearray, width: int) -> tuple[int, bool]:
+def step_size(direction: int, width: int) -> int:
+    return (-width, 1, width, -1)[direction]
+
+
+def peek_guard(position: int, direction: int, width: int, size: int) -> int:
+    """The cell in front of the guard, or -1 if the guard is facing off the map."""
+    step = step_size(direction, width)
+    ahead = position + step
+
+    if ahead < 0 or ahead >= size or (direction % 2 and ahead // width != position // width):
+        return -1
+    return ahead
+
+
+def is_blocked(map: bytes, cell: int, obstacle: int = NO_OBSTACLE) -> bool:
+    return cell == obstacle or map[cell] not in b".^>v<"
+
+
+def step_guard(map: bytes, width: int, position: int, direction: int, obstacle: int = NO_OBSTACLE) -> tuple[int, int]:
     """
-    Move the guard forwards by one step, if possible.
+    Moves the guard forwards by one cell, or turns it if the way is blocked.
+
+    The map is never modified; `obstacle` adds one hypothetical obstacle on top.
 
     Returns:
-        A tuple of (updated_guard_index, not_at_map_edge). If the input guard index is the 
-        same as the returned, and not_at_map_edge is True, then the guard has hit a wall.
+        The guard's new (position, direction). The position is -1 once the
+        guard has walked off the map.
     """
-    next_index = peek_guard(guard_index, map, width)
-    if next_index is None:
-        return guard_index, False
-
-    if map[next_index] != ord("."):
-        return guard_index,  True
-    
-    map[next_index], map[guard_index] = map[guard_index], ord(".")
-    return next_index, True
-    
-def rotate_guard(guard_index: int, map: bytearray, width: int):
-    for _ in range(3):
-        next_char = ROTATE_MAP[map[guard_index]]
-        map[guard_index] = next_char
-        
-        next_index = peek_guard(guard_index, map, width) 
-        if next_index is None or map[next_index] == ord("."):
-            break
-    else:
-        raise RuntimeError("Failed to rotate guard! He is stuck :((")
+    ahead = peek_guard(position, direction, width, len(map))
+    if ahead == -1:
+        return -1, direction
 
+    if is_blocked(map, ahead, obstacle):
+        return position, (direction + 1) % 4
 
-def walk_guard(map: bytearray, width: int, start_index: int | None = None) -> tuple[int, list[int], bool]:
-    """Walks the guard to the next wall, or the edge of the map."""
+    return ahead, direction
 
-    if start_index is not None:
-        guard_index = start_index
-    else:
-        guard_index = find_guard(map)
-        if guard_index is None:
-            print("warning: cannot walk guard: no guard can be found")
-            return -1, [], False
 
-    indices_walked = [guard_index]
+def _next_stops(obstacles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    For every cell of every row, the column just before the next obstacle to
+    the right, and whether the guard would walk off the row instead.
+    """
+    height, width = obstacles.shape
+    columns = np.where(obstacles, np.arange(width, dtype=np.int32), np.int32(width))
+    # the nearest obstacle at or after each column, then shifted to strictly after
+    nearest = np.minimum.accumulate(columns[:, ::-1], axis=1)[:, ::-1]
+    after = np.concatenate([nearest[:, 1:], np.full((height, 1), width, dtype=np.int32)], axis=1)
+    del columns, nearest
+    return after - 1, after == width
 
-    while True:
-        next_index, should_walk = step_guard(guard_index, map, width)
-        if should_walk is False:
-            return next_index, indices_walked, False
-        
-        if next_index == guard_index:
-            return next_index, indices_walked, True
-        
-        indices_walked.append(next_index)
-        guard_index = next_index
 
+class JumpTable:
+    """
+    Where the guard ends up walking straight from any cell in any direction.
 
-def part1(input: TextIO) -> int:
-    map, width = parse_input(input)
-    indices_walked: set[int] = set()
+    `stops[direction * size + cell]` is the cell just before the next obstacle,
+    or `~edge` (always negative) if the guard walks off the map at `edge`.
+    Walking a whole straight segment is then a single lookup.
 
-    # just assert that we have a guard
-    assert find_guard(map) is not None
+    The stops are int32 while the map has fewer than 2**31 cells, and are kept
+    as a memoryview over the NumPy buffer they were built in, which indexes to
+    plain ints without copying the table.
+    """
 
+    def __init__(self, map: bytes, width: int):
+        self.width = width
+        self.height = len(map) // width
+        self.size = len(map)
+        self.steps = (-width, 1, width, -1)
+        self.obstacles = bytearray(map.translate(OBSTACLE_BYTES))
+
+        index_type = np.int32 if self.size < 2**31 else np.int64
+        grid = np.frombuffer(self.obstacles, dtype=np.bool_).reshape(self.height, width)
+        cells = np.arange(self.size, dtype=index_type).reshape(self.height, width)
+        stops = np.empty((4, self.height, width), dtype=index_type)
+
+        # every direction is "to the right" in a suitably flipped/transposed view
+        for direction, view in enumerate((
+            lambda a: a.T[:, ::-1],  # up
+            lambda a: a,             # right
+            lambda a: a.T,           # down
+            lambda a: a[:, ::-1],    # left
+        )):
+            stop_columns, exits = _next_stops(view(grid))
+            stop_cells = np.take_along_axis(view(cells), stop_columns, axis=1)
+            del stop_columns
+            np.invert(stop_cells, out=stop_cells, where=exits)
+            view(stops[direction])[...] = stop_cells
+            del stop_cells, exits
+
+        self.stops = memoryview(stops.reshape(-1))
+
+    @classmethod
+    def from_buffers(cls, width: int, obstacles: memoryview, stops: memoryview) -> "JumpTable":
+        """
+        Wraps the `obstacles` and `stops` of a table built elsewhere, e.g. in
+        shared memory, without copying them.
+        """
+        table = cls.__new__(cls)
+        table.width = width
+        table.size = len(obstacles)
+        table.height = table.size // width
+        table.steps = (-width, 1, width, -1)
+        table.obstacles = obstacles
+        table.stops = stops
+        return table
+
+    def stop(self, cell: int, direction: int, obstacle: int = NO_OBSTACLE) -> int:
+        """
+        Where walking straight from `cell` ends, as in `stops`, with `obstacle`
+        overlaid as one extra obstacle without touching the table.
+        """
+        stop = self.stops[direction * self.size + cell]
+        if obstacle == NO_OBSTACLE:
+            return stop
+
+        end = ~stop if stop < 0 else stop
+        step = self.steps[direction]
+        sign = 1 if step > 0 else -1
+        if 0 < (obstacle - cell) * sign <= (end - cell) * sign and (obstacle - cell) % step == 0:
+            return obstacle - step
+        return stop
+
+    def add_obstacle(self, obstacle: int) -> list[tuple[int, int]]:
+        """
+        Adds an obstacle, patching only the cells whose straight walk now ends
+        at it. Returns the patched (index, old stop) pairs for `remove_obstacle`.
+        """
+        undo: list[tuple[int, int]] = []
+        for direction, step in enumerate(self.steps):
+            before = obstacle - step
+            cell = before
+            while self._in_line(cell, obstacle, direction) and not self.obstacles[cell]:
+                index = direction * self.size + cell
+                undo.append((index, self.stops[index]))
+                self.stops[index] = before
+                cell -= step
+
+        self.obstacles[obstacle] = 1
+        return undo
+
+    def remove_obstacle(self, obstacle: int, undo: list[tuple[int, int]]):
+        """Reverts `add_obstacle(obstacle)`, given the pairs it returned."""
+        self.obstacles[obstacle] = 0
+        for index, stop in undo:
+            self.stops[index] = stop
+
+    def _in_line(self, cell: int, origin: int, direction: int) -> bool:
+        if cell < 0 or cell >= self.size:
+            return False
+        # horizontal steps must stay on the same row
+        return direction % 2 == 0 or cell // self.width == origin // self.width
+
+
+def walk_segments(table: JumpTable, start: int, direction: int, obstacle: int = NO_OBSTACLE):
+    """
+    Yields every straight segment of the guard's walk as (start, end, direction),
+    ending with the one that leaves the map.
+    """
+    position = start
     while True:
-        guard_index, indices, walk_more = walk_guard(map, width)
-        print('=' * width)
-        print_map(map, width)
-        print('=' * width, end="\n\n")
+        stop = table.stop(position, direction, obstacle)
+        if stop < 0:
+            yield position, ~stop, direction
+            return
+
+        yield position, stop, direction
+        position = stop
+        direction = (direction + 1) % 4
 
-        indices_walked = indices_walked.union(indices)
-        if not walk_more:
-            break
 
-        rotate_guard(guard_index, map, width)
+def mark_segment(visited: bytearray, start: int, end: int, step: int):
+    if step < 0:
+        start, end, step = end, start, -step
+    visited[start : end + 1 : step] = b"\x01" * ((end - start) // step + 1)
 
-    print("WALKED AREAS")
-    walked_map = map.copy()
-    print("=" * width)
-    for index in indices_walked:
-        walked_map[index] = ord('X')
 
-    print_map(walked_map, width)
-    return len(indices_walked)
+def part1(parsed: tuple[bytes, int]) -> int:
+    map, width = parsed
 
-class UniqueTranslation(NamedTuple):
-    position: int
-    char_at: int
+    guard_index = find_guard(map)
+    assert guard_index is not None
+
+    table = JumpTable(map, width)
+    visited = bytearray(len(map))
+    trace_steps = tracing.enabled(Level.STEP)
 
-def find_cycle_if_exist(guard_index: int, map: bytearray, width: int) -> tuple[int, list[int] | None, bytearray]:
-    map = map.copy()
-    unique_block_hits: set[int] = {guard_index}
-    all_steps: list[int] = []
+    for start, end, direction in walk_segments(table, guard_index, DIRECTION_CHARS.index(map[guard_index])):
+        if trace_steps:
+            tracing.trace(Level.STEP, "walked {} -> {} facing {}".format, start, end, chr(DIRECTION_CHARS[direction]))
+        mark_segment(visited, start, end, table.steps[direction])
 
-    obstruction_index = peek_guard(guard_index, map, width)
-    if obstruction_index is None:
-        return -1, None, map
+    tracing.trace(Level.FRAME, format_walked_map, map, width, visited)
+    return visited.count(1)
 
-    map[obstruction_index] = ord('O')
-    rotate_guard(guard_index, map, width)
 
+def format_walked_map(map: bytes, width: int, visited: bytearray) -> str:
+    walked_map = bytearray(map)
+    for index, walked in enumerate(visited):
+        if walked:
+            walked_map[index] = ord('X')
+
+    return f"WALKED AREAS\n{'=' * width}\n{format_map(walked_map, width)}"
+
+def first_visits(map: bytes, width: int, start: int, direction: int):
+    """
+    Walks the original patrol cell by cell, yielding (cell, position, direction)
+    the first time each cell other than the start is about to be entered, with
+    the guard's position and direction just before it.
+    """
+    seen = bytearray(len(map))
+    seen[start] = 1
+    position = start
 
     while True:
-        guard_index, steps, continue_walking = walk_guard(map, width)
-        if not continue_walking:
-            return -1, None, map
-        
-        all_steps.extend(steps)
-        if guard_index in unique_block_hits:
-            return obstruction_index, all_steps, map
+        ahead = peek_guard(position, direction, width, len(map))
+        if ahead == -1:
+            return
 
-        rotate_guard(guard_index, map, width)
-        unique_block_hits.add(guard_index)
+        if not seen[ahead] and not is_blocked(map, ahead):
+            seen[ahead] = 1
+            yield ahead, position, direction
 
+        position, direction = step_guard(map, width, position, direction)
 
-def part2(input: TextIO):
-    map, width = parse_input(input)
-    obstruction_indices: list[int] = []
 
-    # just assert that we have a guard
-    guard_index = find_guard(map)
-    assert guard_index is not None
+def walk_loops(
+    table: JumpTable,
+    position: int,
+    direction: int,
+    seen: array,
+    epoch: int,
+    obstacle: int = NO_OBSTACLE,
+) -> bool:
+    """
+    Checks if the guard, starting from `position` facing `direction`, loops
+    once `obstacle` is added.
 
-    steps: list[int] = []
+    A loop is the same (stop cell, direction) being hit twice. `seen` holds the
+    epoch of the last trial that hit each state, so it is shared between
+    trials without ever being cleared.
+    """
     while True:
-        # have overall set for steps walked before arriving to the test location
-        obstruction_index, cycle, cycle_map = find_cycle_if_exist(guard_index, map, width)
-        if cycle is not None:
-            print('='*width, end="")
-            print(f"CYCLE {len(obstruction_indices) + 1}")
-            print_path(cycle_map, width, (steps, 31), (cycle, 32))
-            if obstruction_index not in steps:
-                obstruction_indices.append(obstruction_index)
-
-        steps.append(guard_index)
-        next_index, should_walk = step_guard(guard_index, map, width)
-        if should_walk is False:
+        stop = table.stop(position, direction, obstacle)
+        if stop < 0:
+            return False
+
+        state = stop * 4 + direction
+        if seen[state] == epoch:
+            return True
+        seen[state] = epoch
+
+        position = stop
+        direction = (direction + 1) % 4
+
+
+class TurnGraph:
+    """
+    The guard's route as a functional graph over hit states.
+
+    A hit state `cell * 4 + direction` is the guard standing at `cell`,
+    facing an obstacle in `direction`. From there the route is fixed: turn
+    right, walk straight to the next hit state, or off the map (`EXIT`). Only
+    cells next to an obstacle are hit states, so there are at most four per
+    obstacle.
+
+    Adding an obstacle only changes the edges whose straight segment passes
+    through it, plus the new hit states around it. `patch` finds those
+    through the edges sorted by where their segment ends: `incoming_keys`
+    holds `stop * 4 + direction` for each edge, with the raw `JumpTable.stops`
+    value and walking direction, and `incoming_nodes` the node it leaves from.
+    """
+
+    EXIT = -1
+
+    def __init__(self, table: JumpTable):
+        self.table = table
+        self.successors: dict[int, int] = {}
+        keys: list[np.ndarray] = []
+        sources: list[np.ndarray] = []
+
+        blocked = np.frombuffer(table.obstacles, dtype=np.bool_)
+        stops = np.asarray(table.stops)
+        obstacles = np.flatnonzero(blocked)
+
+        for direction, step in enumerate(table.steps):
+            # the free cells from which the guard walks into each obstacle
+            cells = obstacles - step
+            in_map = (cells >= 0) & (cells < table.size)
+            if direction % 2:
+                in_map &= cells // table.width == obstacles // table.width
+            cells = cells[in_map]
+            cells = cells[~blocked[cells]]
+
+            turned = (direction + 1) % 4
+            ends = stops[turned * table.size + cells].astype(np.int64)
+            nodes = cells * 4 + direction
+            successors = np.where(ends < 0, self.EXIT, ends * 4 + turned)
+
+            self.successors.update(zip(nodes.tolist(), successors.tolist()))
+            keys.append(ends * 4 + turned)
+            sources.append(nodes)
+
+        incoming_keys = np.concatenate(keys)
+        order = np.argsort(incoming_keys, kind="stable")
+        self.incoming_keys: list[int] = incoming_keys[order].tolist()
+        self.incoming_nodes: list[int] = np.concatenate(sources)[order].tolist()
+
+    def patch(self, obstacle: int) -> dict[int, int]:
+        """The edges that change when `obstacle` is added, as {node: successor}."""
+        table = self.table
+        row = obstacle // table.width
+        patched: dict[int, int] = {}
+
+        for direction, step in enumerate(table.steps):
+            before = obstacle - step
+            if before < 0 or before >= table.size or (direction % 2 and before // table.width != row):
+                continue
+            if table.obstacles[before]:
+                continue
+
+            # the new hit state in front of the obstacle...
+            turned = (direction + 1) % 4
+            stop = table.stop(before, turned, obstacle)
+            patched[before * 4 + direction] = self.EXIT if stop < 0 else stop * 4 + turned
+
+            # ...and the edges that used to walk straight through it
+            sign = 1 if step > 0 else -1
+            key = table.stops[direction * table.size + obstacle] * 4 + direction
+            first = bisect.bisect_left(self.incoming_keys, key)
+            last = bisect.bisect_right(self.incoming_keys, key, first)
+            for node in self.incoming_nodes[first:last]:
+                if (obstacle - (node >> 2)) * sign > 0:
+                    patched[node] = before * 4 + direction
+
+        return patched
+
+    def loops(self, position: int, direction: int, obstacle: int, seen: array, epoch: int) -> bool:
+        """
+        Same as `walk_loops`, following the patched graph instead of walking
+        segments. `seen` needs an entry per hit state, `4 * table.size`.
+        """
+        stop = self.table.stop(position, direction, obstacle)
+        if stop < 0:
+            return False
+
+        patched = self.patch(obstacle)
+        successors = self.successors
+        node = stop * 4 + direction
+        while node >= 0:
+            if seen[node] == epoch:
+                return True
+            seen[node] = epoch
+            node = patched[node] if node in patched else successors[node]
+
+        return False
+
+
+def segment_cells(start: int, end: int, step: int) -> list[int]:
+    return list(range(start, end + step, step))
+
+
+# renders the traced loops; `--animate` switches it to repainting in place
+LOOP_FRAMES = FrameRenderer()
+
+
+def format_loop(map: bytes, width: int, table: JumpTable, obstruction: int, position: int, direction: int) -> str:
+    """
+    Draws the loop caused by `obstruction`: the original patrol up to the
+    guard's `position` just before it in red, and the guard's walk from there
+    in green, with the loop it ends up in drawn closed.
+    """
+    map_to_draw = bytearray(map)
+    map_to_draw[obstruction] = ord("O")
+
+    # the segments up to the first repeated (end, direction) state, then the loop
+    # itself, which ends where the approach did
+    segments: list[tuple[int, int, int]] = []
+    seen: dict[tuple[int, int], int] = {}
+    for start, end, direction in walk_segments(table, position, direction, obstruction):
+        if (end, direction) in seen:
+            loop_start = seen[end, direction] + 1
+            segments.append((start, end, direction))
             break
-        
-        if next_index == guard_index:
-            rotate_guard(guard_index, map, width)
+        seen[end, direction] = len(segments)
+        segments.append((start, end, direction))
+
+    def cells(segments: list[tuple[int, int, int]]) -> list[int]:
+        return [
+            cell
+            for start, end, direction in segments
+            for cell in segment_cells(start, end, table.steps[direction])[:-1]
+        ]
+
+    loop = cells(segments[loop_start:])
+    on_loop = set(loop)
+    lead_in = list(itertools.takewhile(lambda cell: cell not in on_loop, cells(segments[:loop_start])))
+
+    guard_index = find_guard(map)
+    assert guard_index is not None
+    patrol = walk_segments(table, guard_index, DIRECTION_CHARS.index(map[guard_index]))
+    approach = list(itertools.takewhile(lambda cell: cell != obstruction, (
+        cell
+        for start, end, direction in patrol
+        for cell in segment_cells(start, end, table.steps[direction])[:-1]
+    )))
+
+    return format_path(
+        map_to_draw,
+        width,
+        Path(approach, 31),
+        Path(loop, 32, closed=True),
+        Path(lead_in, 32),
+        header=f"{'=' * width}\nLOOP AT {obstruction}",
+        renderer=LOOP_FRAMES,
+    )
+
+
+def find_loop_obstructions(map: bytes, width: int) -> list[int]:
+    """
+    Finds every cell where one extra obstruction makes the guard loop.
+
+    Only cells on the original patrol can change it, and each is tried once,
+    at its first visit, resuming from the guard's state just before it rather
+    than from the start. Trials overlay the obstruction on the shared jump
+    table, so none of them copies or modifies anything the size of the map.
+    """
+    guard_index = find_guard(map)
+    assert guard_index is not None
+
+    table = JumpTable(map, width)
+    graph = TurnGraph(table)
+    seen = array("I", [0]) * (4 * table.size)
+    trace_frames = tracing.enabled(Level.FRAME)
+    obstructions: list[int] = []
+
+    for epoch, (cell, position, direction) in enumerate(
+        first_visits(map, width, guard_index, DIRECTION_CHARS.index(map[guard_index])), start=1
+    ):
+        if graph.loops(position, direction, cell, seen, epoch):
+            obstructions.append(cell)
+            if trace_frames:
+                tracing.trace(Level.FRAME, format_loop, map, width, table, cell, position, direction)
+
+    return obstructions
+
+
+def loops_batched(
+    table: JumpTable,
+    positions: np.ndarray,
+    directions: np.ndarray,
+    obstacles: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorised `walk_loops` for a whole batch of guards, each with its own
+    extra obstacle, advanced in lockstep one straight segment at a time.
+
+    Every guard keeps Brent's cycle detection state (a saved hit state and a
+    power of two) instead of a visited set, so memory stays constant per
+    guard however long the walks get. Guards that exit or loop are dropped
+    from the batch as they finish.
+
+    Returns:
+        A boolean mask of the guards that loop.
+    """
+    stops = np.asarray(table.stops)
+    steps = np.array(table.steps, dtype=np.int64)
+    looping = np.zeros(len(positions), dtype=bool)
+
+    active = np.arange(len(positions))
+    position = positions.astype(np.int64)
+    direction = directions.astype(np.int64)
+    obstacle = obstacles.astype(np.int64)
+    saved = np.full(len(positions), -1, dtype=np.int64)
+    power = np.ones(len(positions), dtype=np.int64)
+    length = np.zeros(len(positions), dtype=np.int64)
+
+    while len(active):
+        stop = stops[direction * table.size + position]
+
+        # overlay each guard's own obstacle, as in `JumpTable.stop`
+        end = np.where(stop < 0, ~stop, stop)
+        step = steps[direction]
+        sign = np.sign(step)
+        offset = obstacle - position
+        blocked = (0 < offset * sign) & (offset * sign <= (end - position) * sign) & (offset % step == 0)
+        stop = np.where(blocked, obstacle - step, stop)
+
+        # exits give negative states, so they can never match a saved hit state
+        state = stop * 4 + direction
+        looped = (stop >= 0) & (state == saved)
+        looping[active[looped]] = True
+
+        restart = length == power
+        saved = np.where(restart, state, saved)
+        power = np.where(restart, power * 2, power)
+        length = np.where(restart, 1, length + 1)
+
+        keep = (stop >= 0) & ~looped
+        active = active[keep]
+        position = stop[keep]
+        direction = (direction[keep] + 1) % 4
+        obstacle = obstacle[keep]
+        saved = saved[keep]
+        power = power[keep]
+        length = length[keep]
+
+    return looping
+
+
+def find_loop_obstructions_batched(map: bytes, width: int, batch_size: int = 4096) -> list[int]:
+    """
+    Same as `find_loop_obstructions`, simulating `batch_size` candidate
+    obstructions at a time with `loops_batched`.
+    """
+    guard_index = find_guard(map)
+    assert guard_index is not None
+
+    table = JumpTable(map, width)
+    candidates = np.array(
+        list(first_visits(map, width, guard_index, DIRECTION_CHARS.index(map[guard_index]))),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    trace_frames = tracing.enabled(Level.FRAME)
+    obstructions: list[int] = []
+
+    for start in range(0, len(candidates), batch_size):
+        cells, positions, directions = candidates[start : start + batch_size].T
+        looping = loops_batched(table, positions, directions, cells)
+        obstructions.extend(cells[looping].tolist())
 
-        guard_index = next_index
+        if trace_frames:
+            for cell, position, direction in candidates[start : start + batch_size][looping].tolist():
+                tracing.trace(Level.FRAME, format_loop, map, width, table, cell, position, direction)
 
-    print(f"Total obstruction placements: {len(obstruction_indices)}")
-    return len(set(obstruction_indices))
+    return obstructions
 
 
+# per worker process state for `find_loop_obstructions_parallel`
+_worker_memory: list[shared_memory.SharedMemory] = []
+_worker_table: JumpTable | None = None
+_worker_seen = array("I")
+_worker_epoch = 0
+
+
+def _attach_worker(width: int, obstacles_name: str, stops_name: str, size: int, stops_format: str):
+    global _worker_table, _worker_seen
+
+    obstacles_memory = shared_memory.SharedMemory(obstacles_name)
+    stops_memory = shared_memory.SharedMemory(stops_name)
+    _worker_memory.extend((obstacles_memory, stops_memory))
+
+    _worker_table = JumpTable.from_buffers(
+        width,
+        obstacles_memory.buf[:size],
+        stops_memory.buf[: 4 * size * struct.calcsize(stops_format)].cast(stops_format),
+    )
+    _worker_seen = array("I", [0]) * (4 * size)
+
+
+def _find_loops_in(candidates: list[tuple[int, int, int]]) -> list[int]:
+    global _worker_epoch
+    assert _worker_table is not None
+
+    obstructions: list[int] = []
+    for cell, position, direction in candidates:
+        _worker_epoch += 1
+        if walk_loops(_worker_table, position, direction, _worker_seen, _worker_epoch, cell):
+            obstructions.append(cell)
+
+    return obstructions
+
+
+def _shared_copy(data: memoryview | bytearray) -> shared_memory.SharedMemory:
+    raw = memoryview(data).cast("B")
+    memory = shared_memory.SharedMemory(create=True, size=max(len(raw), 1))
+    memory.buf[: len(raw)] = raw
+    return memory
+
+
+def find_loop_obstructions_parallel(
+    map: bytes,
+    width: int,
+    workers: int | None = None,
+    chunks: int | None = None,
+) -> list[int]:
+    """
+    Same as `find_loop_obstructions`, with the trials split across a process pool.
+
+    The jump table is built once and placed in shared memory, which every
+    worker maps instead of receiving a pickled copy; only the candidate
+    (cell, position, direction) triples are sent over. Chunks are contiguous
+    and merged in order, so the result matches the sequential search exactly.
+    """
+    guard_index = find_guard(map)
+    assert guard_index is not None
+
+    table = JumpTable(map, width)
+    candidates = list(first_visits(map, width, guard_index, DIRECTION_CHARS.index(map[guard_index])))
+    if not candidates:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    chunks = min(chunks or 4 * workers, len(candidates))
+    bounds = [len(candidates) * i // chunks for i in range(chunks + 1)]
+
+    obstacles_memory = _shared_copy(table.obstacles)
+    try:
+        stops_memory = _shared_copy(table.stops)
+        try:
+            with ProcessPoolExecutor(
+                workers,
+                initializer=_attach_worker,
+                initargs=(width, obstacles_memory.name, stops_memory.name, table.size, table.stops.format),
+            ) as pool:
+                results = pool.map(
+                    _find_loops_in,
+                    (candidates[start:stop] for start, stop in itertools.pairwise(bounds)),
+                )
+                obstructions = [cell for result in results for cell in result]
+        finally:
+            stops_memory.close()
+            stops_memory.unlink()
+    finally:
+        obstacles_memory.close()
+        obstacles_memory.unlink()
+
+    if tracing.enabled(Level.FRAME):
+        loops = set(obstructions)
+        for cell, position, direction in candidates:
+            if cell in loops:
+                tracing.trace(Level.FRAME, format_loop, map, width, table, cell, position, direction)
+
+    return obstructions
+
+
+def part2(parsed: tuple[bytes, int]):
+    map, width = parsed
+    obstructions = find_loop_obstructions_batched(map, width)
+
+    tracing.trace(Level.SUMMARY, "Total obstruction placements: {}".format, len(obstructions))
+    return len(obstructions)
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         test_text = (
@@ -263,10 +863,21 @@ if __name__ == "__main__":
         )
 
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        parsed = parse_input(test_io)
+        print(f"test part 1: {part1(parsed)}")
+        print(f"test part 2: {part2(parsed)}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        parsed = parse_input(file)
+
+    if "--animate" in sys.argv[2:]:
+        LOOP_FRAMES.diff = True
+
+    if "--parallel" in sys.argv[2:]:
+        print(f"part 1: {part1(parsed)}")
+        print(f"part 2: {len(find_loop_obstructions_parallel(*parsed))}")
+        exit(0)
+
+    print(f"part 1: {part1(parsed)}")
+    print(f"part 2: {part2(parsed)}")
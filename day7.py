@@ -1,8 +1,10 @@
 import io
-import itertools
 import sys
 from typing import TextIO
 
+import tracing
+from tracing import Level
+
 
 def parse_input(input: TextIO) -> list[tuple[int, tuple[int, ...]]]:
     input.seek(0)
@@ -32,49 +34,73 @@ def evaluate_expression(numbers: tuple[int, ...], operators: tuple[str, ...]) ->
     return total
 
 
-def search_operator_combinations(
+def solve_operators(
     total: int,
     numbers: tuple[int, ...],
     all_operators: tuple[str, ...] = ("+", "*"),
-) -> int:
+) -> tuple[str, ...] | None:
+    """
+    Finds operators that make `numbers` evaluate to `total`, or None.
+
+    Works right to left from `total`, undoing the last operator at each step,
+    and only follows the inverses that are possible: subtracting while the
+    result stays non-negative, dividing when it divides evenly, and removing
+    the last number's digits when `total` ends with them. Most branches die
+    straight away, instead of every operator combination being evaluated.
+    """
     assert len(numbers) >= 2
 
-    num_matches = 0
-    for operators in itertools.product(all_operators, repeat=len(numbers) - 1):
-        # convert to binary number then
-        # map each digit to an operator
-        evaluation = evaluate_expression(numbers, operators)
-        if evaluation == total:
-            print(
-                "numbers",
-                numbers,
-                "operators",
-                operators,
-                "=",
-                evaluation,
-                "want",
-                total,
-            )
-            num_matches += 1
-
-    return num_matches
-
-
-def part1(input: TextIO):
-    entries = parse_input(input)
+    def solve(target: int, last: int) -> tuple[str, ...] | None:
+        number = numbers[last]
+        if last == 0:
+            return () if target == number else None
+
+        if "||" in all_operators:
+            power = 10 ** len(str(number))
+            if target % power == number and (found := solve(target // power, last - 1)) is not None:
+                return (*found, "||")
+
+        if "*" in all_operators:
+            if number == 0:
+                # anything times zero is zero, whatever came before
+                if target == 0:
+                    return ("+",) * (last - 1) + ("*",)
+            elif target % number == 0 and (found := solve(target // number, last - 1)) is not None:
+                return (*found, "*")
+
+        if "+" in all_operators and target >= number:
+            if (found := solve(target - number, last - 1)) is not None:
+                return (*found, "+")
+
+        return None
+
+    operators = solve(total, len(numbers) - 1)
+    if operators is not None:
+        tracing.trace(
+            Level.STEP,
+            "numbers {} operators {} = {} want {}".format,
+            numbers,
+            operators,
+            evaluate_expression(numbers, operators),
+            total,
+        )
+
+    return operators
+
+
+def part1(entries: list[tuple[int, tuple[int, ...]]]):
     return sum(
         total
         for total, numbers in entries
-        if search_operator_combinations(total, numbers) > 0
+        if solve_operators(total, numbers) is not None
     )
 
 
-def part2(input: TextIO):
-    entries = parse_input(input)
+def part2(entries: list[tuple[int, tuple[int, ...]]]):
     return sum(
         total
         for total, numbers in entries
-        if search_operator_combinations(total, numbers, ("+", "*", "||")) > 0
+        if solve_operators(total, numbers, ("+", "*", "||")) is not None
     )
 
 
@@ -93,10 +119,12 @@ if __name__ == "__main__":
         )
 
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        parsed = parse_input(test_io)
+        print(f"test part 1: {part1(parsed)}")
+        print(f"test part 2: {part2(parsed)}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        parsed = parse_input(file)
+        print(f"part 1: {part1(parsed)}")
+        print(f"part 2: {part2(parsed)}")
@@ -3,6 +3,9 @@ import itertools
 import sys
 from typing import TextIO
 
+import tracing
+from tracing import Level
+
 
 def parse_input(input: TextIO) -> tuple[bytearray, int]:
     input.seek(0)
@@ -15,11 +18,18 @@ def parse_input(input: TextIO) -> tuple[bytearray, int]:
     return bytearray("".join(lines).encode()), width
 
 
-def print_map(map: bytearray, width: int):
+def format_map(map: bytearray, width: int) -> str:
     assert len(map) % width == 0
 
-    for i in range(0, len(map), width):
-        print(map[i : i + width].decode())
+    return "\n".join(map[i : i + width].decode() for i in range(0, len(map), width))
+
+
+def draw_antinodes(map: bytearray, width: int, antinodes: set[int]) -> str:
+    map_to_draw = map.copy()
+    for antinode in antinodes:
+        map_to_draw[antinode] = ord("#")
+
+    return format_map(map_to_draw, width)
 
 
 def antinode_valid(antinode_x: int, antinode_y: int, width: int, height: int) -> bool:
@@ -31,8 +41,8 @@ def antinode_valid(antinode_x: int, antinode_y: int, width: int, height: int) ->
     )
 
 
-def part1(input: TextIO):
-    map, width = parse_input(input)
+def part1(parsed: tuple[bytearray, int]):
+    map, width = parsed
     assert len(map) % width == 0
     height = len(map) // width
 
@@ -59,16 +69,12 @@ def part1(input: TextIO):
             if antinode_valid(antinode_x, antinode_y, width, height):
                 antinodes.add(antinode_x + antinode_y * width)
 
-    map_to_draw = map.copy()
-    for antinode in antinodes:
-        map_to_draw[antinode] = ord("#")
-
-    print_map(map_to_draw, width)
+    tracing.trace(Level.FRAME, draw_antinodes, map, width, antinodes)
     return len(antinodes)
 
 
-def part2(input: TextIO):
-    map, width = parse_input(input)
+def part2(parsed: tuple[bytearray, int]):
+    map, width = parsed
     assert len(map) % width == 0
     height = len(map) // width
 
@@ -99,11 +105,7 @@ def part2(input: TextIO):
                 antinode_x += adx
                 antinode_y += ady
 
-    map_to_draw = map.copy()
-    for antinode in antinodes:
-        map_to_draw[antinode] = ord("#")
-
-    print_map(map_to_draw, width)
+    tracing.trace(Level.FRAME, draw_antinodes, map, width, antinodes)
     return len(antinodes)
 
 
@@ -125,10 +127,12 @@ if __name__ == "__main__":
         )
 
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        parsed = parse_input(test_io)
+        print(f"test part 1: {part1(parsed)}")
+        print(f"test part 2: {part2(parsed)}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        parsed = parse_input(file)
+        print(f"part 1: {part1(parsed)}")
+        print(f"part 2: {part2(parsed)}")
@@ -3,6 +3,9 @@ import math
 import sys
 from typing import TextIO
 
+import tracing
+from tracing import Level
+
 SPACE = -1
 
 
@@ -69,13 +72,12 @@ def squash_fs_fragmented(data: list[int]):
         assert False, "failed to complete operation in maximum time bound"
 
 
-def part1(input: TextIO):
-    compressed_fs = parse_input(input)
+def part1(compressed_fs: str):
     uncompressed = expand_fs(compressed_fs)
 
-    print("UNCOMPRESSED: ", format_uncompressed(uncompressed))
+    tracing.trace(Level.FRAME, lambda: f"UNCOMPRESSED: {format_uncompressed(uncompressed)}")
     squash_fs_fragmented(uncompressed)
-    print("SOLVED:", format_uncompressed(uncompressed))
+    tracing.trace(Level.FRAME, lambda: f"SOLVED: {format_uncompressed(uncompressed)}")
     return calculate_checksum(uncompressed)
 
 
@@ -96,10 +98,9 @@ def find_file_ltr(file_id: int, data: list[int], /, start: int = 0) -> tuple[int
     return -1, 0
 
 
-def print_state_and_ptr(ptr: int, data: list[int]):
+def format_state_and_ptr(ptr: int, data: list[int]) -> str:
     ptr_str = "".join("^" if i == ptr else "_" for i in range(len(data)))
-    print("STATE:", format_uncompressed(data))
-    print("PTRS :", ptr_str)
+    return f"STATE: {format_uncompressed(data)}\nPTRS : {ptr_str}"
 
 
 def squash_fs_blocked(data: list[int]):
@@ -144,22 +145,21 @@ def squash_fs_blocked(data: list[int]):
             continue
 
         assert space_size > 0
-        # print_state_and_ptr(read_ptr, data)
+        # tracing.trace(Level.STEP, format_state_and_ptr, read_ptr, data)
         file_data = data[read_ptr : read_ptr + file_size]
         data[space_ptr : space_ptr + space_size] = file_data + [SPACE] * (
             space_size - file_size
         )
         data[read_ptr : read_ptr + file_size] = [SPACE] * file_size
-        # print_state_and_ptr(read_ptr, data)
+        # tracing.trace(Level.STEP, format_state_and_ptr, read_ptr, data)
 
 
-def part2(input: TextIO):
-    compressed_fs = parse_input(input)
+def part2(compressed_fs: str):
     uncompressed = expand_fs(compressed_fs)
 
-    print("UNCOMPRESSED: ", format_uncompressed(uncompressed))
+    tracing.trace(Level.FRAME, lambda: f"UNCOMPRESSED: {format_uncompressed(uncompressed)}")
     squash_fs_blocked(uncompressed)
-    print("SOLVED:", format_uncompressed(uncompressed))
+    tracing.trace(Level.FRAME, lambda: f"SOLVED: {format_uncompressed(uncompressed)}")
     return calculate_checksum(uncompressed)
 
 
@@ -167,10 +167,12 @@ if __name__ == "__main__":
     if len(sys.argv) < 2:
         test_text = "2333133121414131402"
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        parsed = parse_input(test_io)
+        print(f"test part 1: {part1(parsed)}")
+        print(f"test part 2: {part2(parsed)}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        parsed = parse_input(file)
+        print(f"part 1: {part1(parsed)}")
+        print(f"part 2: {part2(parsed)}")
@@ -0,0 +1,276 @@
+"""
+Seeded generators for structurally valid puzzle inputs at any scale.
+
+Each generator takes a `scale` and a `random.Random` and returns the input text.
+What `scale` means depends on the day, see `SCALE_UNITS`.
+
+usage: python -m aoc gen DAY SCALE [--seed N] [-o FILE]
+"""
+import bisect
+import random
+from typing import Callable
+
+import numpy as np
+
+SCALE_UNITS = {
+    1: "rows",
+    2: "reports",
+    3: "bytes",
+    4: "grid side",
+    5: "updates",
+    6: "map side",
+    7: "equations",
+    8: "map side",
+    9: "digits",
+}
+
+
+def generate_day1(scale: int, rng: random.Random) -> str:
+    return "\n".join(
+        f"{rng.randint(10000, 99999)}   {rng.randint(10000, 99999)}"
+        for _ in range(scale)
+    )
+
+
+def generate_day2(scale: int, rng: random.Random) -> str:
+    reports = []
+    for _ in range(scale):
+        direction = rng.choice((-1, 1))
+        level = rng.randint(20, 80)
+        levels = [level]
+        for _ in range(rng.randint(4, 7)):
+            # mostly valid steps, with the odd bad one to exercise the dampener
+            if rng.random() < 0.1:
+                level += rng.randint(-4, 4)
+            else:
+                level += direction * rng.randint(1, 3)
+            levels.append(level)
+        reports.append(" ".join(map(str, levels)))
+
+    return "\n".join(reports)
+
+
+MEMORY_NOISE = b"abcdlmnotu(),'![]<>{}:;@#$%^&*+-_ 0123456789\n"
+
+
+def generate_memory(size: int, rng: random.Random) -> bytes:
+    """Random noise sprinkled with valid and nearly valid instructions."""
+    pieces: list[bytes] = []
+    length = 0
+
+    while length < size:
+        roll = rng.random()
+        if roll < 0.6:
+            piece = bytes(rng.choices(MEMORY_NOISE, k=rng.randint(1, 12)))
+        elif roll < 0.85:
+            piece = f"mul({rng.randint(0, 999)},{rng.randint(0, 999)})".encode()
+        elif roll < 0.88:
+            piece = f"mul({rng.randint(0, 999)},{rng.randint(0, 999)}]".encode()
+        elif roll < 0.9:
+            # operands that are too long, and instructions with the wrong arguments
+            piece = rng.choice((
+                f"mul({rng.randint(1000, 99999)},{rng.randint(0, 999)})",
+                f"mul({rng.randint(0, 999)},{rng.randint(1000, 99999)})",
+                "mul()",
+                f"do({rng.randint(0, 9)},{rng.randint(0, 9)})",
+                "don't(1)",
+            )).encode()
+        elif roll < 0.95:
+            piece = b"do()"
+        else:
+            piece = b"don't()"
+
+        pieces.append(piece)
+        length += len(piece)
+
+    return b"".join(pieces)[:size]
+
+
+def generate_day3(scale: int, rng: random.Random) -> str:
+    return generate_memory(scale, rng).decode()
+
+
+def _numpy_rng(rng: random.Random) -> np.random.Generator:
+    return np.random.default_rng(rng.getrandbits(64))
+
+
+def _grid_text(grid: np.ndarray) -> str:
+    rows = np.concatenate([grid, np.full((grid.shape[0], 1), ord("\n"), dtype=np.uint8)], axis=1)
+    return rows.tobytes().decode().rstrip("\n")
+
+
+def generate_day4(scale: int, rng: random.Random) -> str:
+    letters = np.frombuffer(b"XMAS", dtype=np.uint8)
+    return _grid_text(_numpy_rng(rng).choice(letters, size=(scale, scale)))
+
+
+def generate_day5(scale: int, rng: random.Random) -> str:
+    # every page is ordered against the next 24 in a hidden permutation, and
+    # updates are drawn from windows of 25, so each update is totally ordered
+    pages = list(range(11, 100))
+    rng.shuffle(pages)
+    window = 25
+
+    rules = [
+        f"{pages[i]}|{pages[j]}"
+        for i in range(len(pages))
+        for j in range(i + 1, min(i + window, len(pages)))
+    ]
+    rng.shuffle(rules)
+
+    updates = []
+    for _ in range(scale):
+        start = rng.randint(0, len(pages) - window)
+        update = rng.sample(pages[start : start + window], rng.randrange(5, window, 2))
+        if rng.random() < 0.5:
+            update.sort(key=pages.index)
+        updates.append(",".join(map(str, update)))
+
+    return "\n".join(rules) + "\n\n" + "\n".join(updates)
+
+
+def _clear_guard_loops(grid: np.ndarray, row: int, column: int):
+    """
+    Removes obstacles from `grid` until a guard starting at (row, column),
+    facing up, walks off the map.
+
+    The guard is walked an obstacle at a time with sorted obstacle lists per
+    row and column. Whenever it hits the same obstacle from the same side
+    twice it is in a loop, so that obstacle is cleared and the walk starts
+    over from the beginning.
+    """
+    blocked = grid == ord("#")
+    rows = [np.flatnonzero(line).tolist() for line in blocked]
+    columns = [np.flatnonzero(line).tolist() for line in blocked.T]
+
+    while True:
+        r, c, direction = row, column, 0
+        hits: set[tuple[int, int, int]] = set()
+
+        while True:
+            if direction == 0:
+                line = columns[c]
+                i = bisect.bisect_left(line, r) - 1
+                if i < 0:
+                    return
+                obstacle = line[i], c
+                r = line[i] + 1
+            elif direction == 1:
+                line = rows[r]
+                i = bisect.bisect_right(line, c)
+                if i == len(line):
+                    return
+                obstacle = r, line[i]
+                c = line[i] - 1
+            elif direction == 2:
+                line = columns[c]
+                i = bisect.bisect_right(line, r)
+                if i == len(line):
+                    return
+                obstacle = line[i], c
+                r = line[i] - 1
+            else:
+                line = rows[r]
+                i = bisect.bisect_left(line, c) - 1
+                if i < 0:
+                    return
+                obstacle = r, line[i]
+                c = line[i] + 1
+
+            if (r, c, direction) in hits:
+                obstacle_row, obstacle_column = obstacle
+                grid[obstacle_row, obstacle_column] = ord(".")
+                rows[obstacle_row].remove(obstacle_column)
+                columns[obstacle_column].remove(obstacle_row)
+                break
+
+            hits.add((r, c, direction))
+            direction = (direction + 1) % 4
+
+
+def generate_day6(scale: int, rng: random.Random) -> str:
+    nprng = _numpy_rng(rng)
+    grid = np.where(nprng.random((scale, scale)) < 0.05, ord("#"), ord(".")).astype(np.uint8)
+
+    # keep the way ahead clear so the guard can't start boxed in, and make
+    # sure its patrol leaves the map as the puzzle promises
+    middle = scale // 2
+    if middle > 0:
+        grid[middle - 1, middle] = ord(".")
+    grid[middle, middle] = ord(".")
+    _clear_guard_loops(grid, middle, middle)
+    grid[middle, middle] = ord("^")
+    return _grid_text(grid)
+
+
+def generate_day7(scale: int, rng: random.Random, operands: int = 12) -> str:
+    equations = []
+    for _ in range(scale):
+        numbers = [rng.randint(1, 99) for _ in range(rng.randint(2, operands))]
+
+        total = numbers[0]
+        for number in numbers[1:]:
+            operator = rng.choice("+*|")
+            if operator == "+":
+                total += number
+            elif operator == "*":
+                total *= number
+            else:
+                total = int(f"{total}{number}")
+
+        # roughly a third of the equations can't be solved
+        if rng.random() < 0.3:
+            total += rng.randint(1, 9)
+
+        equations.append(f"{total}: {' '.join(map(str, numbers))}")
+
+    return "\n".join(equations)
+
+
+def generate_day8(scale: int, rng: random.Random) -> str:
+    nprng = _numpy_rng(rng)
+    antennas = np.frombuffer(b"0123456789abcdefghijABCDEFGHIJ", dtype=np.uint8)
+
+    grid = np.full((scale, scale), ord("."), dtype=np.uint8)
+    count = max(2, scale * scale // 200)
+    flat = nprng.choice(scale * scale, size=min(count, scale * scale), replace=False)
+    grid.flat[flat] = nprng.choice(antennas, size=len(flat))
+    return _grid_text(grid)
+
+
+def generate_day9(scale: int, rng: random.Random) -> str:
+    nprng = _numpy_rng(rng)
+    digits = nprng.integers(0, 10, size=scale, dtype=np.uint8)
+    # files are never empty
+    digits[0::2] = np.maximum(digits[0::2], 1)
+    return (digits + ord("0")).tobytes().decode()
+
+
+GENERATORS: dict[int, Callable[[int, random.Random], str]] = {
+    1: generate_day1,
+    2: generate_day2,
+    3: generate_day3,
+    4: generate_day4,
+    5: generate_day5,
+    6: generate_day6,
+    7: generate_day7,
+    8: generate_day8,
+    9: generate_day9,
+}
+
+# sizes that finish in reasonable time for the current solvers
+DEFAULT_SCALES = {
+    1: (10_000, 100_000, 1_000_000),
+    2: (10_000, 100_000, 1_000_000),
+    3: (100_000, 1_000_000, 10_000_000),
+    4: (50, 100, 200),
+    5: (1_000, 10_000, 100_000),
+    6: (20, 40, 80),
+    7: (1_000, 10_000, 100_000),
+    8: (50, 100, 200),
+    9: (1_000, 2_000, 4_000),
+}
+
+
+def generate(day: int, scale: int, seed: int = 0) -> str:
+    return GENERATORS[day](scale, random.Random(seed))
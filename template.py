@@ -9,12 +9,12 @@ def parse_input(input: TextIO) -> ...:
     _ = lines
 
 
-def part1(input: TextIO):
-    _ = parse_input(input)
+def part1(parsed: ...):
+    _ = parsed
 
 
-def part2(input: TextIO):
-    _ = parse_input(input)
+def part2(parsed: ...):
+    _ = parsed
 
 
 if __name__ == "__main__":
@@ -29,10 +29,12 @@ if __name__ == "__main__":
         )
 
         test_io = io.StringIO(test_text)
-        print(f"test part 1: {part1(test_io)}")
-        print(f"test part 2: {part2(test_io)}")
+        parsed = parse_input(test_io)
+        print(f"test part 1: {part1(parsed)}")
+        print(f"test part 2: {part2(parsed)}")
         exit(0)
 
     with open(sys.argv[1]) as file:
-        print(f"part 1: {part1(file)}")
-        print(f"part 2: {part2(file)}")
+        parsed = parse_input(file)
+        print(f"part 1: {part1(parsed)}")
+        print(f"part 2: {part2(parsed)}")
@@ -0,0 +1,78 @@
+"""
+Verbosity-controlled tracing and visualisation for the day solvers.
+
+Solvers pass a render callable (and its arguments) instead of a string, so no
+rendering happens unless the current level asks for it:
+
+    tracing.trace(Level.FRAME, format_map, map, width)
+
+Levels:
+    OFF     - nothing (the default)
+    SUMMARY - a line or two per part
+    FRAME   - whole maps / disks / paths as they change
+    STEP    - every token, window or match inside the hot loops
+
+The level and sink can be set with `set_level`/`set_sink`, or through the
+AOC_TRACE and AOC_TRACE_FILE environment variables. A file given there is
+closed when the interpreter exits.
+"""
+import atexit
+import enum
+import os
+import sys
+from typing import Any, Callable, TextIO
+
+
+class Level(enum.IntEnum):
+    OFF = 0
+    SUMMARY = 1
+    FRAME = 2
+    STEP = 3
+
+
+def parse_level(name: str) -> Level:
+    """Looks up a level by its case-insensitive name, e.g. "frame"."""
+    try:
+        return Level[name.upper()]
+    except KeyError:
+        names = ", ".join(level.name.lower() for level in Level)
+        raise ValueError(f"unknown trace level {name!r}, expected one of: {names}") from None
+
+
+try:
+    _level = parse_level(os.environ.get("AOC_TRACE", "off"))
+except ValueError as error:
+    raise SystemExit(f"AOC_TRACE: {error}") from None
+_sink: TextIO | None = None
+
+
+def set_level(level: Level | str):
+    global _level
+    _level = parse_level(level) if isinstance(level, str) else level
+
+
+def set_sink(sink: TextIO | None):
+    """Sends traces to `sink`, or back to stdout for None."""
+    global _sink
+    _sink = sink
+
+
+def enabled(level: Level) -> bool:
+    """Lets hot loops check the level once up front instead of per call."""
+    return _level >= level
+
+
+def trace(level: Level, render: Callable[..., str], *args: Any):
+    """Writes `render(*args)` if tracing at `level` is enabled."""
+    if _level < level:
+        return
+
+    sink = _sink if _sink is not None else sys.stdout
+    sink.write(render(*args))
+    sink.write("\n")
+
+
+if "AOC_TRACE_FILE" in os.environ:
+    _file_sink = open(os.environ["AOC_TRACE_FILE"], "w")
+    atexit.register(_file_sink.close)
+    set_sink(_file_sink)